@@ -1,9 +1,19 @@
-from typing import Dict, AsyncGenerator
+from typing import Any, Awaitable, Callable, Dict, AsyncGenerator, Mapping, Optional, Tuple
+from types import MappingProxyType
 import time
 import asyncio
 from astrbot.api.event import AstrMessageEvent
 from astrbot.api import logger
-from .base_handler import BaseCommandHandler
+from .base_handler import BaseCommandHandler, error_boundary
+
+
+# 文本分隔线
+_SEP_EQ = "=" * 40
+_SEP_DASH = "-" * 40
+
+# 封禁列表中不随玩家变化的行
+_BAN_PERMANENT_LINE = "    ⏰ 类型: 永久封禁"
+_BAN_EXPIRED_LINE = "    ⏰ 状态: 已过期（待系统清理）"
 
 
 class AdminCommandHandler(BaseCommandHandler):
@@ -17,9 +27,35 @@ class AdminCommandHandler(BaseCommandHandler):
     - 房间管理
     """
     
-    def get_command_handlers(self) -> Dict[str, callable]:
+    def __init__(self, plugin_instance):
+        """
+        初始化管理员命令处理器
+        
+        Args:
+            plugin_instance: 主插件实例
         """
-        获取管理员命令映射
+        super().__init__(plugin_instance)
+        self._command_handlers: Optional[Mapping[str, callable]] = None
+        
+        # 统计数据短期缓存：键 -> (缓存时间, 数据)，每个键一把锁防止并发重复计算
+        self._stats_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._stats_locks: Dict[str, asyncio.Lock] = {}
+        self.stats_cache_ttl = 10  # 秒
+    
+    def get_command_handlers(self) -> Mapping[str, callable]:
+        """
+        获取管理员命令映射（首次调用时构建，之后复用只读映射）
+        
+        Returns:
+            Mapping[str, callable]: 命令名到处理方法的映射
+        """
+        if self._command_handlers is None:
+            self._command_handlers = MappingProxyType(self._build_command_handlers())
+        return self._command_handlers
+    
+    def _build_command_handlers(self) -> Dict[str, callable]:
+        """
+        构建管理员命令映射
         
         Returns:
             Dict[str, callable]: 命令名到处理方法的映射
@@ -41,6 +77,38 @@ class AdminCommandHandler(BaseCommandHandler):
         }
     
     
+    async def _cached_stats(self, key: str, fetch: Callable[[], Awaitable[Dict[str, Any]]],
+                            ttl: Optional[float] = None) -> Dict[str, Any]:
+        """
+        获取带短期缓存的统计数据
+        
+        同一时间只有一个调用者会真正计算，其余调用者等待后直接读取缓存
+        
+        Args:
+            key: 缓存键
+            fetch: 计算统计数据的协程函数
+            ttl: 缓存有效期（秒），默认使用 stats_cache_ttl
+            
+        Returns:
+            Dict[str, Any]: 统计数据
+        """
+        ttl = self.stats_cache_ttl if ttl is None else ttl
+        cached = self._stats_cache.get(key)
+        if cached and time.time() - cached[0] < ttl:
+            return cached[1]
+        
+        lock = self._stats_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            # 等锁期间可能已被其他调用者刷新
+            cached = self._stats_cache.get(key)
+            if cached and time.time() - cached[0] < ttl:
+                return cached[1]
+            
+            data = await fetch()
+            self._stats_cache[key] = (time.time(), data)
+            return data
+    
+    @error_boundary("获取管理员面板")
     async def handle_admin_panel(self, event: AstrMessageEvent) -> AsyncGenerator:
         """
         处理管理员面板命令
@@ -49,19 +117,17 @@ class AdminCommandHandler(BaseCommandHandler):
             event: 消息事件对象
         """
         
-        try:
-            # 获取系统统计
-            system_stats = await self.player_manager.get_system_stats()
-            room_stats = await self.room_manager.get_room_stats()
-            
-            # 构建管理员面板
-            panel_text = self.ui_builder.build_admin_panel(system_stats, room_stats)
-            yield event.plain_result(panel_text)
-            
-        except Exception as e:
-            async for result in self.handle_error(event, e, "获取管理员面板"):
-                yield result
+        # 并发获取系统统计和房间统计
+        system_stats, room_stats = await asyncio.gather(
+            self._cached_stats('system', self.player_manager.get_system_stats),
+            self._cached_stats('room', self.room_manager.get_room_stats)
+        )
+        
+        # 构建管理员面板
+        panel_text = self.ui_builder.build_admin_panel(system_stats, room_stats)
+        yield event.plain_result(panel_text)
     
+    @error_boundary("封禁玩家")
     async def handle_admin_ban(self, event: AstrMessageEvent, player_id: str, duration: int = 24, reason: str = "违规行为") -> AsyncGenerator:
         """
         处理封禁玩家命令
@@ -73,42 +139,39 @@ class AdminCommandHandler(BaseCommandHandler):
             reason: 封禁原因
         """
         
-        try:
-            # 使用插件中已有的玩家ID解析方法
-            resolved_player_id, error_msg = await self._resolve_player_id(player_id)
-            if error_msg:
-                yield event.plain_result(error_msg)
-                return
-            
-            player = await self.player_manager.get_player(resolved_player_id)
-            if not player:
-                yield event.plain_result(f"❌ 玩家不存在: {resolved_player_id}")
-                return
-            
-            if player.is_banned:
-                yield event.plain_result(f"❌ 玩家 {player.display_name} 已被封禁")
-                return
+        # 使用插件中已有的玩家ID解析方法
+        resolved_player_id, error_msg = await self._resolve_player_id(player_id)
+        if error_msg:
+            yield event.plain_result(error_msg)
+            return
+        
+        player = await self.player_manager.get_player(resolved_player_id)
+        if not player:
+            yield event.plain_result(f"❌ 玩家不存在: {resolved_player_id}")
+            return
+        
+        if player.is_banned:
+            yield event.plain_result(f"❌ 玩家 {player.display_name} 已被封禁")
+            return
+        
+        # 执行封禁 - 修复参数顺序：player_id, reason, duration_hours
+        success = await self.player_manager.ban_player(resolved_player_id, reason, duration)
+        if success:
+            self.invalidate_ban_cache(resolved_player_id)
+            yield event.plain_result(f"✅ 已封禁玩家 {player.display_name} {duration}小时\n原因: {reason}")
             
-            # 执行封禁 - 修复参数顺序：player_id, reason, duration_hours
-            success = await self.player_manager.ban_player(resolved_player_id, reason, duration)
-            if success:
-                yield event.plain_result(f"✅ 已封禁玩家 {player.display_name} {duration}小时\n原因: {reason}")
-                
-                # 检查玩家是否在房间中，如果是则将其踢出
-                current_room = await self.room_manager.get_player_room(resolved_player_id)
-                if current_room:
-                    leave_success = await self.room_manager.leave_room(current_room.room_id, resolved_player_id)
-                    if leave_success:
-                        yield event.plain_result(f"🏠 已将被封禁玩家从房间 {current_room.room_id[:8]} 中移除")
-                    else:
-                        yield event.plain_result(f"⚠️ 封禁成功但从房间移除失败")
-            else:
-                yield event.plain_result(f"❌ 封禁操作失败")
-                
-        except Exception as e:
-            async for result in self.handle_error(event, e, "封禁玩家"):
-                yield result
+            # 检查玩家是否在房间中，如果是则将其踢出
+            current_room = await self.room_manager.get_player_room(resolved_player_id)
+            if current_room:
+                leave_success = await self.room_manager.leave_room(current_room.room_id, resolved_player_id)
+                if leave_success:
+                    yield event.plain_result(f"🏠 已将被封禁玩家从房间 {current_room.room_id[:8]} 中移除")
+                else:
+                    yield event.plain_result(f"⚠️ 封禁成功但从房间移除失败")
+        else:
+            yield event.plain_result(f"❌ 封禁操作失败")
     
+    @error_boundary("获取详细统计")
     async def handle_admin_detailed_stats(self, event: AstrMessageEvent) -> AsyncGenerator:
         """
         处理详细统计命令
@@ -117,37 +180,30 @@ class AdminCommandHandler(BaseCommandHandler):
             event: 消息事件对象
         """
         
-        try:
-            # 获取详细统计信息
-            system_stats = await self.player_manager.get_system_stats()
-            room_stats = await self.room_manager.get_room_stats()
-            
-            lines = []
-            lines.append("📊 德州扑克详细统计")
-            lines.append("=" * 40)
-            
-            # 系统统计
-            lines.append("🖥️ 系统信息:")
-            lines.append(f"  👥 总注册玩家: {system_stats.get('total_players', 0)}")
-            lines.append(f"  🟢 活跃玩家(7天): {system_stats.get('active_players', 0)}")
-            lines.append(f"  🎲 总游戏局数: {system_stats.get('total_games', 0)}")
-            lines.append(f"  💰 流通筹码总量: {system_stats.get('total_chips', 0):,}")
-            runtime_seconds = time.time() - self.plugin.start_time
-            lines.append(f"  📅 运行时间: {self.ui_builder.format_duration(runtime_seconds)}")
-            lines.append("")
-            
-            # 房间统计
-            lines.append("🏠 房间信息:")
-            lines.append(f"  📊 活跃房间数: {room_stats.get('total_rooms', 0)}")
-            lines.append(f"  🟢 游戏中: {room_stats.get('active_rooms', 0)}")
-            lines.append(f"  ⏳ 等待中: {room_stats.get('waiting_rooms', 0)}")
-            lines.append(f"  👥 在线玩家: {room_stats.get('total_players', 0)}")
-            
-            yield event.plain_result("\n".join(lines))
-            
-        except Exception as e:
-            async for result in self.handle_error(event, e, "获取详细统计"):
-                yield result
+        # 并发获取详细统计信息
+        system_stats, room_stats = await asyncio.gather(
+            self._cached_stats('system', self.player_manager.get_system_stats),
+            self._cached_stats('room', self.room_manager.get_room_stats)
+        )
+        
+        runtime_seconds = time.time() - self.plugin.start_time
+        
+        stats_text = f"""📊 德州扑克详细统计
+{_SEP_EQ}
+🖥️ 系统信息:
+  👥 总注册玩家: {system_stats.get('total_players', 0)}
+  🟢 活跃玩家(7天): {system_stats.get('active_players', 0)}
+  🎲 总游戏局数: {system_stats.get('total_games', 0)}
+  💰 流通筹码总量: {system_stats.get('total_chips', 0):,}
+  📅 运行时间: {self.ui_builder.format_duration(runtime_seconds)}
+
+🏠 房间信息:
+  📊 活跃房间数: {room_stats.get('total_rooms', 0)}
+  🟢 游戏中: {room_stats.get('active_rooms', 0)}
+  ⏳ 等待中: {room_stats.get('waiting_rooms', 0)}
+  👥 在线玩家: {room_stats.get('total_players', 0)}"""
+        
+        yield event.plain_result(stats_text)
 
     # 以下方法委托给主插件处理
     async def handle_admin_players(self, event: AstrMessageEvent, limit: int = 20) -> AsyncGenerator:
@@ -195,107 +251,77 @@ class AdminCommandHandler(BaseCommandHandler):
         async for result in self.plugin.admin_config(event):
             yield result
             
+    @error_boundary("查看封禁列表")
     async def handle_admin_banned_list(self, event: AstrMessageEvent, page: int = 1) -> AsyncGenerator:
         """查看封禁玩家列表"""
-        try:
-            if not await self.ensure_plugin_initialized():
-                yield event.plain_result("❌ 插件正在初始化，请稍后重试")
-                return
+        if not await self.ensure_plugin_initialized():
+            yield event.plain_result("❌ 插件正在初始化，请稍后重试")
+            return
+        
+        # 过期封禁由玩家管理器的后台任务清理，这里只读取封禁索引
+        total_banned = self.player_manager.get_banned_count()
+        
+        if not total_banned:
+            yield event.plain_result("📋 当前没有被封禁的玩家")
+            return
+        
+        # 分页显示
+        items_per_page = 10
+        total_pages = -(-total_banned // items_per_page)
+        page = max(1, min(page, total_pages))
+        
+        start_idx = (page - 1) * items_per_page
+        page_players = self.player_manager.get_banned_players(start_idx, start_idx + items_per_page)
+        
+        # 构建显示信息
+        ban_lines = []
+        ban_lines.append("🚫 封禁玩家列表")
+        ban_lines.append(_SEP_EQ)
+        ban_lines.append(f"📊 总计: {total_banned} 名被封禁玩家")
+        ban_lines.append(f"📄 第 {page}/{total_pages} 页")
+        ban_lines.append(_SEP_DASH)
+        
+        # 获取当前时间用于计算剩余封禁时间
+        current_time = time.time()
+        for player in page_players:
+            ban_parts = [f"🔴 {player.display_name or player.player_id[-8:]}"]
             
-            # 获取所有封禁玩家，同时检查并清理过期封禁
-            banned_players = []
-            expired_players = []
-            current_check_time = time.time()
+            # 封禁原因
+            if player.ban_reason:
+                ban_parts.append(f"    📝 原因: {player.ban_reason}")
             
-            for player_id, player in self.player_manager.players.items():
-                # 检查封禁状态，如果过期则自动清理
-                if player.ban_status:
-                    if player.ban_until > 0 and current_check_time >= player.ban_until:
-                        # 过期封禁，自动清理
-                        player.ban_status = False
-                        player.ban_reason = ""
-                        player.ban_until = 0
-                        self.player_manager.cache_dirty = True
-                        expired_players.append(player)
+            # 封禁时间
+            if player.ban_until == 0:
+                ban_parts.append(_BAN_PERMANENT_LINE)
+            elif player.ban_until > 0:
+                remaining = player.ban_until - current_time
+                if remaining > 0:
+                    days, rem = divmod(int(remaining), 86400)
+                    hours, rem = divmod(rem, 3600)
+                    minutes = rem // 60
+                    if days > 0:
+                        ban_parts.append(f"    ⏰ 剩余: {days}天{hours}小时")
+                    elif hours > 0:
+                        ban_parts.append(f"    ⏰ 剩余: {hours}小时{minutes}分钟")
                     else:
-                        # 仍在封禁期
-                        banned_players.append(player)
-            
-            # 如果有过期玩家被清理，记录日志
-            if expired_players:
-                expired_names = [p.display_name or p.player_id[-8:] for p in expired_players]
-                logger.info(f"清理过期封禁玩家: {', '.join(expired_names)}")
-                # 异步保存
-                asyncio.create_task(self.player_manager.save_all_players())
-            
-            if not banned_players:
-                yield event.plain_result("📋 当前没有被封禁的玩家")
-                return
-            
-            # 分页显示
-            items_per_page = 10
-            total_pages = (len(banned_players) + items_per_page - 1) // items_per_page
-            page = max(1, min(page, total_pages))
-            
-            start_idx = (page - 1) * items_per_page
-            end_idx = start_idx + items_per_page
-            page_players = banned_players[start_idx:end_idx]
-            
-            # 构建显示信息
-            ban_lines = []
-            ban_lines.append("🚫 封禁玩家列表")
-            ban_lines.append("=" * 40)
-            ban_lines.append(f"📊 总计: {len(banned_players)} 名被封禁玩家")
-            ban_lines.append(f"📄 第 {page}/{total_pages} 页")
-            ban_lines.append("-" * 40)
+                        ban_parts.append(f"    ⏰ 剩余: {minutes}分钟")
+                else:
+                    ban_parts.append(_BAN_EXPIRED_LINE)
             
-            # 获取当前时间用于计算剩余封禁时间
-            current_time = time.time()
-            for player in page_players:
-                status_emoji = "🔴"
-                ban_info = f"{status_emoji} {player.display_name or player.player_id[-8:]}"
-                
-                # 封禁原因
-                if hasattr(player, 'ban_reason') and player.ban_reason:
-                    ban_info += f"\n    📝 原因: {player.ban_reason}"
-                
-                # 封禁时间
-                if hasattr(player, 'ban_until'):
-                    if player.ban_until == 0:
-                        ban_info += f"\n    ⏰ 类型: 永久封禁"
-                    elif player.ban_until > 0:
-                        remaining = player.ban_until - current_time
-                        if remaining > 0:
-                            days = int(remaining // 86400)
-                            hours = int((remaining % 86400) // 3600)
-                            minutes = int((remaining % 3600) // 60)
-                            if days > 0:
-                                ban_info += f"\n    ⏰ 剩余: {days}天{hours}小时"
-                            elif hours > 0:
-                                ban_info += f"\n    ⏰ 剩余: {hours}小时{minutes}分钟"
-                            else:
-                                ban_info += f"\n    ⏰ 剩余: {minutes}分钟"
-                        else:
-                            ban_info += f"\n    ⏰ 状态: 已过期（待系统清理）"
-                
-                ban_lines.append(ban_info)
-                ban_lines.append("")
-            
-            # 翻页提示
-            if total_pages > 1:
-                ban_lines.append("📖 翻页命令:")
-                if page > 1:
-                    ban_lines.append(f"    /poker_admin_banned {page-1} - 上一页")
-                if page < total_pages:
-                    ban_lines.append(f"    /poker_admin_banned {page+1} - 下一页")
-                ban_lines.append("")
-            
-            ban_lines.append("💡 使用 /poker_admin_unban [玩家ID] 解除封禁")
-            
-            yield event.plain_result("\n".join(ban_lines))
-            
-        except Exception as e:
-            async for result in self.handle_error(event, e, "查看封禁列表"):
-                yield result
+            ban_lines.append("\n".join(ban_parts))
+            ban_lines.append("")
+        
+        # 翻页提示
+        if total_pages > 1:
+            ban_lines.append("📖 翻页命令:")
+            if page > 1:
+                ban_lines.append(f"    /poker_admin_banned {page-1} - 上一页")
+            if page < total_pages:
+                ban_lines.append(f"    /poker_admin_banned {page+1} - 下一页")
+            ban_lines.append("")
+        
+        ban_lines.append("💡 使用 /poker_admin_unban [玩家ID] 解除封禁")
+        
+        yield event.plain_result("\n".join(ban_lines))
     
     # 这里可以添加更多管理员命令的处理方法...
@@ -1,8 +1,32 @@
 from abc import ABC, abstractmethod
-from typing import Optional, AsyncGenerator
+from typing import Callable, Dict, Optional, AsyncGenerator, Tuple
+import functools
 import time
 from astrbot.api.event import AstrMessageEvent
 from astrbot.api import logger
+from ..models.player_manager import PlayerInfo
+
+
+def error_boundary(operation: str):
+    """
+    命令处理异常边界装饰器，异常时通过 handle_error 生成错误消息
+    
+    Args:
+        operation: 操作描述，用于错误消息
+        
+    Returns:
+        装饰器函数
+    """
+    def decorator(func: Callable):
+        @functools.wraps(func)
+        async def wrapper(self, event, *args, **kwargs):
+            try:
+                async for result in func(self, event, *args, **kwargs):
+                    yield result
+            except Exception as e:
+                yield event.plain_result(self.handle_error(event, e, operation))
+        return wrapper
+    return decorator
 
 
 class BaseCommandHandler(ABC):
@@ -12,6 +36,10 @@ class BaseCommandHandler(ABC):
     提供通用的功能和接口定义，所有具体的命令处理器都应继承此类
     """
     
+    # 封禁状态检查结果缓存：用户ID -> (缓存时间, 封禁信息)，所有处理器共享
+    _ban_status_cache: Dict[str, Tuple[float, str]] = {}
+    BAN_STATUS_TTL = 30  # 缓存有效期（秒）
+    
     def __init__(self, plugin_instance):
         """
         初始化处理器
@@ -26,6 +54,10 @@ class BaseCommandHandler(ABC):
         self.ui_builder = plugin_instance.ui_builder
         self.plugin_config = plugin_instance.plugin_config
         
+        # 管理员集合缓存（配置变更后调用 invalidate_admin_cache 重建）
+        self._admin_set = frozenset()
+        self.invalidate_admin_cache()
+        
     @abstractmethod
     def get_command_handlers(self):
         """
@@ -36,7 +68,53 @@ class BaseCommandHandler(ABC):
         """
         pass
     
-    async def handle_error(self, event: AstrMessageEvent, error: Exception, operation: str = "操作") -> AsyncGenerator:
+    @staticmethod
+    def _sender_id(event: AstrMessageEvent) -> str:
+        """
+        获取发送者ID（首次解析后缓存在事件对象上，同一事件内重复调用不再解析）
+        
+        Args:
+            event: 消息事件对象
+            
+        Returns:
+            str: 发送者ID
+        """
+        sender_id = getattr(event, "_cached_sender_id", None)
+        if sender_id is None:
+            sender_id = event.get_sender_id()
+            event._cached_sender_id = sender_id
+        return sender_id
+    
+    def invalidate_admin_cache(self):
+        """根据当前配置重建管理员集合缓存（统一转为字符串，与 get_sender_id 返回值一致）"""
+        self._admin_set = frozenset(str(user_id) for user_id in self.plugin_config.get('admin_users', ()))
+    
+    def _is_admin(self, user_id: str) -> bool:
+        """
+        检查用户是否在配置的管理员列表中
+        
+        Args:
+            user_id: 用户ID
+            
+        Returns:
+            bool: 是否为管理员
+        """
+        return user_id in self._admin_set
+    
+    @classmethod
+    def invalidate_ban_cache(cls, user_id: Optional[str] = None):
+        """
+        使封禁状态缓存失效（封禁、解封等操作后调用）
+        
+        Args:
+            user_id: 用户ID，为None时清空全部缓存
+        """
+        if user_id is None:
+            cls._ban_status_cache.clear()
+        else:
+            cls._ban_status_cache.pop(user_id, None)
+    
+    def handle_error(self, event: AstrMessageEvent, error: Exception, operation: str = "操作") -> str:
         """
         统一的错误处理
         
@@ -44,9 +122,12 @@ class BaseCommandHandler(ABC):
             event: 消息事件对象
             error: 异常对象
             operation: 操作描述
+            
+        Returns:
+            str: 发送给用户的错误消息
         """
         logger.error(f"{operation}失败: {error}")
-        yield event.plain_result(f"❌ {operation}失败: {str(error)}")
+        return f"❌ {operation}失败: {str(error)}"
     
     async def ensure_plugin_initialized(self) -> bool:
         """
@@ -55,6 +136,10 @@ class BaseCommandHandler(ABC):
         Returns:
             bool: 是否初始化成功
         """
+        # 快速路径：已初始化时无需进入协程调用链
+        if self.plugin.is_initialized:
+            return True
+        
         try:
             await self.plugin.ensure_initialized()
             return True
@@ -73,10 +158,23 @@ class BaseCommandHandler(ABC):
         Returns:
             bool: 是否成功（注册或已存在）
         """
+        return await self.get_registered_player(event, user_id) is not None
+    
+    async def get_registered_player(self, event: AstrMessageEvent, user_id: str) -> Optional[PlayerInfo]:
+        """
+        获取玩家信息，未注册时自动注册
+        
+        Args:
+            event: 消息事件对象
+            user_id: 用户ID
+            
+        Returns:
+            Optional[PlayerInfo]: 玩家信息，失败时返回None
+        """
         try:
             # 确保插件已初始化
             if not await self.ensure_plugin_initialized():
-                return False
+                return None
                 
             player = await self.player_manager.get_player(user_id)
             if not player:
@@ -85,13 +183,10 @@ class BaseCommandHandler(ABC):
                 player = await self.player_manager.get_or_create_player(user_id, display_name)
                 if player:
                     logger.info(f"自动注册新玩家: {user_id} ({display_name})")
-                    return True
-                else:
-                    return False
-            return True
+            return player
         except Exception as e:
             logger.error(f"检查玩家注册状态失败: {e}")
-            return False
+            return None
     
     async def _check_player_ban_status(self, user_id: str) -> str:
         """
@@ -107,15 +202,28 @@ class BaseCommandHandler(ABC):
             if not await self.ensure_plugin_initialized():
                 return ""
             
+            # 快速路径：玩家数据已完整加载时，不在封禁索引中的玩家（绝大多数）直接放行
+            player_manager = self.player_manager
+            if player_manager.players_loaded and user_id not in player_manager.banned_index:
+                return ""
+            
+            now = time.time()
+            cached = self._ban_status_cache.get(user_id)
+            if cached and now - cached[0] < self.BAN_STATUS_TTL:
+                return cached[1]
+            
             # 检查玩家封禁状态
+            ban_message = ""
             player = await self.player_manager.get_player(user_id)
             if player and player.is_banned:
-                if player.ban_until > 0:
-                    remaining_hours = (player.ban_until - time.time()) / 3600
-                    if remaining_hours > 0:
-                        return f"❌ 您已被封禁，剩余时间: {remaining_hours:.1f}小时"
-                return f"❌ 您已被封禁，原因: {player.ban_reason}"
-            return ""
+                remaining_hours = (player.ban_until - now) / 3600 if player.ban_until > 0 else 0
+                if remaining_hours > 0:
+                    ban_message = f"❌ 您已被封禁，剩余时间: {remaining_hours:.1f}小时"
+                else:
+                    ban_message = f"❌ 您已被封禁，原因: {player.ban_reason}"
+            
+            self._ban_status_cache[user_id] = (now, ban_message)
+            return ban_message
             
         except Exception as e:
             logger.error(f"检查玩家封禁状态失败: {e}")
@@ -1,9 +1,138 @@
-from typing import Dict, AsyncGenerator, Tuple, Optional
+from typing import Callable, Dict, AsyncGenerator, Mapping, Tuple, Optional
+from types import MappingProxyType
 from astrbot.api.event import AstrMessageEvent
 from astrbot.api import logger
+import asyncio
 import time
-from .base_handler import BaseCommandHandler
-from ..models.game_engine import PlayerAction, GamePhase
+from functools import lru_cache
+from operator import itemgetter
+from .base_handler import BaseCommandHandler, error_boundary
+from ..models.game_engine import GamePlayer, PlayerAction, GamePhase
+from ..models.player_manager import PlayerInfo
+from ..models.room_manager import GameRoom, JoinStatus, RoomStatus
+
+__all__ = ["GameCommandHandler"]
+
+# 文本分隔线
+_SEP_EQ = "=" * 40
+_SEP_DASH = "-" * 40
+
+# 房间状态图标
+_STATUS_ICONS = {
+    RoomStatus.WAITING: "⏳",
+    RoomStatus.IN_GAME: "🎮",
+    RoomStatus.FINISHED: "✅",
+}
+
+# 游戏阶段显示名称
+_PHASE_NAMES = {
+    GamePhase.PRE_FLOP: "翻牌前",
+    GamePhase.FLOP: "翻牌后",
+    GamePhase.TURN: "转牌后",
+    GamePhase.RIVER: "河牌后",
+}
+
+# 玩家操作显示名称
+_ACTION_NAMES = {
+    PlayerAction.FOLD: "弃牌",
+    PlayerAction.CHECK: "过牌",
+    PlayerAction.CALL: "跟注",
+    PlayerAction.RAISE: "加注",
+    PlayerAction.ALL_IN: "全押",
+}
+
+# 排行榜前三名图标
+_RANK_ICONS = {1: "🥇", 2: "🥈", 3: "🥉"}
+
+# 成就页面的行模板（字段取自 get_achievement_progress 返回的成就信息）
+_ACHIEVEMENT_ROW_UNLOCKED = "✅ {icon} {name}\n    {description}\n    🆔 ID: {id} | 奖励: {reward} 筹码\n"
+_ACHIEVEMENT_ROW_LOCKED = (
+    "🔒 {icon} {name}\n    {description}\n"
+    "    进度: {current_progress}/{target} {bar} {progress_percent:.1f}% | 奖励: {reward} 筹码\n"
+)
+
+
+def _settlement_hand_desc(player: Optional[GamePlayer], result: Dict) -> str:
+    """
+    获取结算时展示的手牌信息（优先显示牌型，否则显示手牌）
+    
+    Args:
+        player: 游戏内玩家（可能已不在牌桌上）
+        result: 该玩家的牌局结果
+        
+    Returns:
+        str: 手牌描述
+    """
+    hand_desc = result.get('hand_description', '未知牌型')
+    if hand_desc != '未知牌型':
+        return hand_desc
+    
+    # 尝试显示玩家的手牌
+    hand_cards = result.get('hand_cards')
+    if hand_cards and len(hand_cards) == 2:
+        return "手牌: " + " ".join(hand_cards)
+    
+    # 如果都没有，尝试从游戏引擎获取
+    hole_cards = getattr(player, 'hole_cards', None) if player else None
+    if hole_cards:
+        return "手牌: " + " ".join([card.rendered for card in hole_cards])
+    return hand_desc
+
+
+def _settlement_line(display_name: str, profit: int, hand_desc: str) -> str:
+    """
+    构建单个玩家的结算信息行
+    
+    Args:
+        display_name: 玩家显示名称
+        profit: 本局盈亏
+        hand_desc: 手牌描述
+        
+    Returns:
+        str: 结算信息行
+    """
+    if profit > 0:
+        return f"🏆 {display_name}: +{profit} 筹码 | {hand_desc}"
+    if profit == 0:
+        return f"🤝 {display_name}: ±0 筹码 | {hand_desc}"
+    return f"💸 {display_name}: {profit} 筹码 | {hand_desc}"
+
+
+def _leaderboard_row(rank: int, player_info: PlayerInfo, achievement_labels: Dict[str, str]) -> str:
+    """
+    构建排行榜中单个玩家的显示块（玩家行、统计行、装备成就行及空行）
+    
+    Args:
+        rank: 排名
+        player_info: 玩家信息
+        achievement_labels: 成就ID到展示标签的映射
+        
+    Returns:
+        str: 玩家显示块
+    """
+    rank_icon = _RANK_ICONS.get(rank) or f"{rank:2d}."
+    equipped = player_info.equipped_achievement
+    equipped_label = achievement_labels.get(equipped, equipped) if equipped else "无装备成就"
+    return (
+        f"{rank_icon} {player_info.display_name or player_info.player_id[-8:]}\n"
+        f"    💰{player_info.chips:,} | 🎲{player_info.total_games} | 🏆{player_info.win_rate:.1f}% | ⭐{len(player_info.achievements)}\n"
+        f"    💎 {equipped_label}\n"
+    )
+
+
+@lru_cache(maxsize=None)
+def _progress_bar(filled: int, length: int = 10) -> str:
+    """
+    构建进度条字符串（取值有限，结果缓存复用）
+    
+    Args:
+        filled: 已填充格数
+        length: 进度条总长度
+        
+    Returns:
+        str: 进度条字符串
+    """
+    return "[" + "█" * filled + "░" * (length - filled) + "]"
 
 
 class GameCommandHandler(BaseCommandHandler):
@@ -17,9 +146,139 @@ class GameCommandHandler(BaseCommandHandler):
     - 统计和排行榜
     """
     
-    def get_command_handlers(self) -> Dict[str, callable]:
+    STATUS_CACHE_TTL = 3  # 状态查询结果缓存有效期（秒）
+    STATS_CACHE_TTL = 5  # 统计查询结果缓存有效期（秒）
+    LEADERBOARD_CACHE_TTL = 30  # 排行榜页面缓存有效期（秒）
+    _SEP = "=" * 30
+    
+    def __init__(self, plugin_instance):
+        """
+        初始化游戏命令处理器
+        
+        Args:
+            plugin_instance: 主插件实例
+        """
+        super().__init__(plugin_instance)
+        self._command_handlers: Mapping[str, callable] = MappingProxyType(self._build_command_handlers())
+        
+        # 状态查询结果缓存：用户ID -> (过期时间, 房间指纹, 状态文本)
+        self._status_cache: Dict[str, Tuple[float, tuple, str]] = {}
+        # 进行中的状态查询：同一用户的并发查询共享一次加载
+        self._status_inflight: Dict[str, asyncio.Future] = {}
+        # 统计查询结果缓存：用户ID -> (缓存时间, 统计文本)，牌局结算时失效
+        self._stats_text_cache: Dict[str, Tuple[float, str]] = {}
+        # 排行榜页面缓存：(排序类别, 页码) -> (缓存时间 time.monotonic, 排行榜文本)，玩家数据变化时清空
+        self._leaderboard_cache: Dict[Tuple[str, int], Tuple[float, str]] = {}
+    
+    def invalidate_status_cache(self, user_id: Optional[str] = None):
+        """
+        使状态查询缓存失效
+        
+        Args:
+            user_id: 用户ID，为None时清空全部缓存
+        """
+        if user_id is None:
+            self._status_cache.clear()
+        else:
+            self._status_cache.pop(user_id, None)
+    
+    def invalidate_player_caches(self, player_id: str):
+        """
+        玩家数据（筹码、统计）在本处理器之外变化时，使相关的展示缓存失效
+        
+        Args:
+            player_id: 玩家ID
+        """
+        self._stats_text_cache.pop(player_id, None)
+        self._status_cache.pop(player_id, None)
+        self._leaderboard_cache.clear()
+    
+    async def _prepare_join(self, user_id: str) -> Tuple[str, Optional[GameRoom], PlayerInfo]:
+        """
+        一次性并发获取加入房间所需的封禁信息、当前房间和玩家信息
+        
+        Args:
+            user_id: 用户ID
+            
+        Returns:
+            Tuple[str, Optional[GameRoom], PlayerInfo]: (封禁信息, 当前房间, 玩家信息)
+        """
+        ban_error, current_room, player = await asyncio.gather(
+            self._check_player_ban_status(user_id),
+            self.room_manager.get_player_room(user_id),
+            self.player_manager.get_or_create_player(user_id)
+        )
+        return ban_error, current_room, player
+    
+    async def _load_status(self, event: AstrMessageEvent, user_id: str) -> Tuple[Optional[PlayerInfo], Optional[GameRoom]]:
+        """
+        加载状态查询所需的玩家和房间（注册检查与房间查询并发进行）
+        
+        Args:
+            event: 消息事件对象
+            user_id: 用户ID
+            
+        Returns:
+            Tuple[Optional[PlayerInfo], Optional[GameRoom]]: (玩家信息, 当前房间)
+        """
+        player, current_room = await asyncio.gather(
+            self.get_registered_player(event, user_id),
+            self.room_manager.get_player_room(user_id)
+        )
+        return player, current_room
+    
+    async def _resolve_active_turn(self, event: AstrMessageEvent, user_id: str) -> Tuple[Optional[GameRoom], Optional[GamePlayer], str]:
         """
-        获取游戏命令映射
+        玩家操作前的统一检查：插件初始化、玩家注册、所在房间、游戏进行中、是否轮到该玩家
+        
+        Args:
+            event: 消息事件对象
+            user_id: 用户ID
+            
+        Returns:
+            Tuple[Optional[GameRoom], Optional[GamePlayer], str]: (房间, 游戏内玩家, 错误信息)，检查通过时错误信息为空字符串
+        """
+        if not await self.ensure_plugin_initialized():
+            return None, None, "❌ 插件正在初始化，请稍后重试"
+        
+        # 注册检查与房间查询并发进行
+        registered, room = await asyncio.gather(
+            self.get_registered_player(event, user_id),
+            self.room_manager.get_player_room(user_id)
+        )
+        if not registered:
+            return None, None, "❌ 玩家注册失败"
+        
+        # 检查玩家是否在房间中
+        if not room:
+            return None, None, "❌ 您当前不在任何房间中"
+        
+        # 检查游戏是否在进行
+        game = room.game
+        if not game or game.is_game_over():
+            return room, None, "❌ 当前没有进行中的游戏"
+        
+        # 检查是否轮到该玩家
+        if game.current_player_id != user_id:
+            current_player = game.players.get(game.current_player_id)
+            if current_player:
+                return room, None, f"❌ 还没轮到您，当前是 {current_player.display_name} 的回合"
+            return room, None, "❌ 还没轮到您"
+        
+        return room, game.players[user_id], ""
+    
+    def get_command_handlers(self) -> Mapping[str, callable]:
+        """
+        获取游戏命令映射（初始化时构建，之后复用只读映射）
+        
+        Returns:
+            Mapping[str, callable]: 命令名到处理方法的映射
+        """
+        return self._command_handlers
+    
+    def _build_command_handlers(self) -> Dict[str, callable]:
+        """
+        构建游戏命令映射
         
         Returns:
             Dict[str, callable]: 命令名到处理方法的映射
@@ -43,6 +302,7 @@ class GameCommandHandler(BaseCommandHandler):
             'poker_leaderboard': self.handle_leaderboard,
         }
     
+    @error_boundary("加入房间")
     async def handle_join_room(self, event: AstrMessageEvent, room_id: str = "") -> AsyncGenerator:
         """
         处理加入房间命令
@@ -51,55 +311,53 @@ class GameCommandHandler(BaseCommandHandler):
             event: 消息事件对象
             room_id: 房间ID（为空时快速匹配）
         """
-        user_id = event.get_sender_id()
+        user_id = self._sender_id(event)
         
-        try:
-            # 检查封禁状态
-            ban_error = await self._check_player_ban_status(user_id)
-            if ban_error:
-                yield event.plain_result(ban_error)
-                return
-            
-            # 检查玩家是否已在游戏中
-            current_room = await self.room_manager.get_player_room(user_id)
-            if current_room:
-                yield event.plain_result(f"❌ 您已在房间 {current_room.room_id[:8]} 中，请先离开当前游戏")
-                return
-            
-            # 检查积分是否足够
-            player = await self.player_manager.get_or_create_player(user_id)
-            if player.chips <= 0:
-                yield event.plain_result("❌ 积分不足，无法加入游戏。请联系管理员充值。")
-                return
-            
-            if room_id:
-                # 加入指定房间
-                room = await self.room_manager.get_room(room_id)
-                if not room:
-                    yield event.plain_result(f"❌ 房间 {room_id} 不存在")
-                    return
-                    
-                result = await self.room_manager.join_room(room_id, user_id)
-                if result:
-                    yield event.plain_result(f"✅ 成功加入房间 {room_id}")
-                    room_status = self.ui_builder.build_room_status(room)
-                    yield event.plain_result(room_status)
-                else:
-                    yield event.plain_result("❌ 加入房间失败，房间可能已满或游戏进行中")
+        ban_error, current_room, player = await self._prepare_join(user_id)
+        
+        # 检查封禁状态
+        if ban_error:
+            yield event.plain_result(ban_error)
+            return
+        
+        # 检查玩家是否已在游戏中
+        if current_room:
+            yield event.plain_result(f"❌ 您已在房间 {current_room.short_id} 中，请先离开当前游戏")
+            return
+        
+        # 检查积分是否足够
+        if player.chips <= 0:
+            yield event.plain_result("❌ 积分不足，无法加入游戏。请联系管理员充值。")
+            return
+        
+        if room_id:
+            # 加入指定房间（房间存在性由 join_room 一并检查）
+            result = await self.room_manager.join_room(room_id, user_id, _player=player)
+            status = result.status
+            if status is JoinStatus.JOINED:
+                self.invalidate_status_cache(user_id)
+                room_status = self.ui_builder.build_room_status(result.room)
+                yield event.plain_result(f"✅ 成功加入房间 {room_id}\n\n{room_status}")
+            elif status is JoinStatus.WAITLISTED:
+                self.invalidate_status_cache(user_id)
+                yield event.plain_result(f"⏳ 房间 {room_id} 已满，已加入等待列表")
+            elif status is JoinStatus.NOT_FOUND:
+                yield event.plain_result(f"❌ 房间 {room_id} 不存在")
+            elif status is JoinStatus.INSUFFICIENT_CHIPS:
+                yield event.plain_result(f"❌ 积分不足，该房间最低买入 {result.room.min_buy_in}")
             else:
-                # 快速匹配
-                room = await self.room_manager.quick_match(user_id)
-                if room:
-                    yield event.plain_result(f"✅ 已匹配到房间 {room.room_id[:8]}")
-                    room_status = self.ui_builder.build_room_status(room)
-                    yield event.plain_result(room_status)
-                else:
-                    yield event.plain_result("❌ 暂无可用房间，请稍后重试或创建新房间")
-                    
-        except Exception as e:
-            async for result in self.handle_error(event, e, "加入房间"):
-                yield result
+                yield event.plain_result("❌ 加入房间失败，房间可能已满或游戏进行中")
+        else:
+            # 快速匹配
+            room = await self.room_manager.quick_match(user_id)
+            if room:
+                self.invalidate_status_cache(user_id)
+                room_status = self.ui_builder.build_room_status(room)
+                yield event.plain_result(f"✅ 已匹配到房间 {room.short_id}\n\n{room_status}")
+            else:
+                yield event.plain_result("❌ 暂无可用房间，请稍后重试或创建新房间")
     
+    @error_boundary("离开房间")
     async def handle_leave_room(self, event: AstrMessageEvent) -> AsyncGenerator:
         """
         处理离开房间命令（简化版本，避免竞态条件）
@@ -107,26 +365,17 @@ class GameCommandHandler(BaseCommandHandler):
         Args:
             event: 消息事件对象
         """
-        user_id = event.get_sender_id()
+        user_id = self._sender_id(event)
         
-        try:
-            current_room = await self.room_manager.get_player_room(user_id)
-            if not current_room:
-                yield event.plain_result("❌ 您当前不在任何房间中")
-                return
-            
-            room_id = current_room.room_id
-            success = await self.room_manager.leave_room(room_id, user_id)
-            
-            if success:
-                yield event.plain_result("✅ 已成功离开游戏")
-            else:
-                yield event.plain_result("❌ 离开游戏失败，请重试")
-                
-        except Exception as e:
-            async for result in self.handle_error(event, e, "离开房间"):
-                yield result
+        left_room = await self.room_manager.leave_current_room(user_id)
+        if not left_room:
+            yield event.plain_result("❌ 您当前不在任何房间中")
+            return
+        
+        self.invalidate_status_cache(user_id)
+        yield event.plain_result("✅ 已成功离开游戏")
     
+    @error_boundary("创建房间")
     async def handle_create_room(self, event: AstrMessageEvent, blind_level: int = 1) -> AsyncGenerator:
         """
         处理创建房间命令
@@ -135,42 +384,41 @@ class GameCommandHandler(BaseCommandHandler):
             event: 消息事件对象
             blind_level: 盲注级别
         """
-        user_id = event.get_sender_id()
+        user_id = self._sender_id(event)
         
-        try:
-            # 确保插件已初始化
-            if not await self.ensure_plugin_initialized():
-                yield event.plain_result("❌ 插件正在初始化，请稍后重试")
-                return
-            # 检查玩家是否已经在房间中
-            existing_room = await self.room_manager.get_player_room(user_id)
-            if existing_room:
-                yield event.plain_result(f"❌ 您已在房间 {existing_room.room_id[:8]} 中")
-                return
-            
-            # 检查盲注级别
-            valid_levels = self.plugin_config.get("blind_levels", [1, 2, 5, 10, 25, 50])
-            if blind_level not in valid_levels:
-                yield event.plain_result(f"❌ 盲注级别必须是: {valid_levels}")
+        # 确保插件已初始化
+        if not await self.ensure_plugin_initialized():
+            yield event.plain_result("❌ 插件正在初始化，请稍后重试")
+            return
+        # 检查玩家是否已经在房间中
+        existing_room = await self.room_manager.get_player_room(user_id)
+        if existing_room:
+            yield event.plain_result(f"❌ 您已在房间 {existing_room.short_id} 中")
+            return
+        
+        # 检查盲注级别
+        valid_levels = self.plugin_config.get("blind_levels", [1, 2, 5, 10, 25, 50])
+        if blind_level not in valid_levels:
+            yield event.plain_result(f"❌ 盲注级别必须是: {valid_levels}")
+            return
+        
+        # 创建房间
+        room = await self.room_manager.create_room(
+            creator_id=user_id,
+            small_blind=blind_level,
+            big_blind=blind_level * 2,
+            max_players=6
+        )
+        
+        if room:
+            # 确保创建者已注册
+            if not await self.require_player_registration(event, user_id):
+                yield event.plain_result("❌ 玩家注册失败，无法创建房间")
                 return
             
-            # 创建房间
-            room = await self.room_manager.create_room(
-                creator_id=user_id,
-                small_blind=blind_level,
-                big_blind=blind_level * 2,
-                max_players=6
-            )
-            
-            if room:
-                # 确保创建者已注册
-                if not await self.require_player_registration(event, user_id):
-                    yield event.plain_result("❌ 玩家注册失败，无法创建房间")
-                    return
-                
-                # 显示房间创建成功信息
-                room_info = f"""✅ 房间创建成功！
-🏠 房间号: {room.room_id[:8]}
+            # 显示房间创建成功信息
+            room_info = f"""✅ 房间创建成功！
+🏠 房间号: {room.short_id}
 💰 盲注: {blind_level}/{blind_level*2}
 👤 房主: {event.get_sender_name() or '匿名玩家'}
 📋 状态: 等待玩家加入
@@ -178,21 +426,17 @@ class GameCommandHandler(BaseCommandHandler):
 🎮 游戏说明:
 • 至少需要 2 名玩家才能开始
 • 使用 /poker_start 开始游戏
-• 分享房间号让其他人加入: /poker_join {room.room_id[:8]}
+• 分享房间号让其他人加入: /poker_join {room.short_id}
 
-💡 提示: 其他玩家可以通过 /poker_rooms 查看房间列表"""
-                
-                yield event.plain_result(room_info)
-                
-                # 提示玩家接下来的操作
-                yield event.plain_result("🎯 等待更多玩家加入，或使用 /poker_start 开始游戏（至少2人）")
-            else:
-                yield event.plain_result("❌ 房间创建失败")
-                
-        except Exception as e:
-            async for result in self.handle_error(event, e, "创建房间"):
-                yield result
+💡 提示: 其他玩家可以通过 /poker_rooms 查看房间列表
 
+🎯 等待更多玩家加入，或使用 /poker_start 开始游戏（至少2人）"""
+            
+            yield event.plain_result(room_info)
+        else:
+            yield event.plain_result("❌ 房间创建失败")
+
+    @error_boundary("获取统计信息")
     async def handle_player_stats(self, event: AstrMessageEvent) -> AsyncGenerator:
         """
         处理玩家统计查询命令
@@ -200,32 +444,37 @@ class GameCommandHandler(BaseCommandHandler):
         Args:
             event: 消息事件对象
         """
-        user_id = event.get_sender_id()
+        user_id = self._sender_id(event)
         
-        try:
-            # 确保玩家注册
-            if not await self.require_player_registration(event, user_id):
-                yield event.plain_result("❌ 玩家注册失败")
-                return
-            
-            player = await self.player_manager.get_player(user_id)
-            stats = await self.player_manager.get_player_stats(user_id)
-            
-            if not player or not stats:
-                yield event.plain_result("❌ 获取统计数据失败")
-                return
-            
-            # 构建统计信息
-            stats_text = f"""📊 {player.display_name} 的详细统计
+        cached = self._stats_text_cache.get(user_id)
+        if cached and time.time() - cached[0] < self.STATS_CACHE_TTL:
+            yield event.plain_result(cached[1])
+            return
+        
+        # 确保玩家注册（注册后玩家已在缓存中，统计查询才能命中）
+        player = await self.get_registered_player(event, user_id)
+        if not player:
+            yield event.plain_result("❌ 玩家注册失败")
+            return
+        
+        stats = await self.player_manager.get_player_stats(user_id)
+        
+        if not player or not stats:
+            yield event.plain_result("❌ 获取统计数据失败")
+            return
+        
+        # 构建统计信息
+        games = max(player.total_games, 1)
+        stats_text = f"""📊 {player.display_name} 的详细统计
 
 💰 筹码信息:
 • 当前筹码: {player.chips:,}
 • 历史总盈亏: {player.total_profit:+,}
-• 平均每局盈亏: {(stats.player_info.total_profit / max(stats.player_info.total_games, 1)):+.1f}
+• 平均每局盈亏: {(stats.player_info.total_profit / games):+.1f}
 
 🎮 游戏记录:
 • 总游戏: {player.total_games} 局
-• 胜利: {player.wins} 局 ({(player.wins/max(player.total_games,1)*100):.1f}%)
+• 胜利: {player.wins} 局 ({(player.wins / games * 100):.1f}%)
 • 失败: {player.losses} 局
 • 最长连胜: {stats.longest_winning_streak} 局
 • 最长连败: {stats.longest_losing_streak} 局
@@ -241,12 +490,10 @@ class GameCommandHandler(BaseCommandHandler):
 • 经验值: {player.experience}
 • 距离升级: {1000 - (player.experience % 1000)} EXP"""
 
-            yield event.plain_result(stats_text)
-            
-        except Exception as e:
-            async for result in self.handle_error(event, e, "获取统计信息"):
-                yield result
+        self._stats_text_cache[user_id] = (time.time(), stats_text)
+        yield event.plain_result(stats_text)
 
+    @error_boundary("获取房间列表")
     async def handle_rooms_list(self, event: AstrMessageEvent) -> AsyncGenerator:
         """
         处理房间列表查询命令
@@ -254,41 +501,33 @@ class GameCommandHandler(BaseCommandHandler):
         Args:
             event: 消息事件对象
         """
-        try:
-            rooms = list(self.room_manager.rooms.values())
-            
-            if not rooms:
-                yield event.plain_result("🏠 当前没有活跃房间\n使用 /poker_create 创建新房间")
-                return
-            
-            # 过滤可见房间（非私人房间）
-            public_rooms = [room for room in rooms if not room.is_private]
-            
-            if not public_rooms:
-                yield event.plain_result("🏠 当前没有公开房间\n使用 /poker_create 创建新房间")
-                return
-            
-            room_list = "🏠 可用房间列表:\n\n"
-            
-            for room in public_rooms[:10]:  # 最多显示10个房间
-                status_icon = {
-                    "WAITING": "⏳",
-                    "IN_GAME": "🎮", 
-                    "FINISHED": "✅"
-                }.get(room.status.name, "❓")
-                
-                room_list += f"{status_icon} {room.room_id[:8]}\n"
-                room_list += f"  👥 {room.current_players}/{room.max_players} 人\n"
-                room_list += f"  💰 {room.small_blind}/{room.big_blind}\n"
-                room_list += f"  📍 {room.status.name}\n\n"
-            
-            room_list += "使用 /poker_join [房间号] 加入房间"
-            yield event.plain_result(room_list)
-            
-        except Exception as e:
-            async for result in self.handle_error(event, e, "获取房间列表"):
-                yield result
+        if not self.room_manager.rooms:
+            yield event.plain_result("🏠 当前没有活跃房间\n使用 /poker_create 创建新房间")
+            return
+        
+        # 可见房间（非私人房间），最多显示10个
+        public_rooms = self.room_manager.get_public_rooms(10)
+        
+        if not public_rooms:
+            yield event.plain_result("🏠 当前没有公开房间\n使用 /poker_create 创建新房间")
+            return
+        
+        parts = ["🏠 可用房间列表:", ""]
+        
+        for room in public_rooms:
+            status_icon = _STATUS_ICONS.get(room.status, "❓")
+            parts.extend((
+                f"{status_icon} {room.short_id}",
+                f"  👥 {room.current_players}/{room.max_players} 人",
+                f"  💰 {room.small_blind}/{room.big_blind}",
+                f"  📍 {room.status.name}",
+                ""
+            ))
+        
+        parts.append("使用 /poker_join [房间号] 加入房间")
+        yield event.plain_result("\n".join(parts))
 
+    @error_boundary("查询状态")
     async def handle_player_status(self, event: AstrMessageEvent) -> AsyncGenerator:
         """
         处理玩家状态查询命令
@@ -296,55 +535,63 @@ class GameCommandHandler(BaseCommandHandler):
         Args:
             event: 消息事件对象
         """
-        user_id = event.get_sender_id()
+        user_id = self._sender_id(event)
         
-        try:
-            # 确保插件已初始化
-            if not await self.ensure_plugin_initialized():
-                yield event.plain_result("❌ 插件正在初始化，请稍后重试")
-                return
-                
-            # 确保玩家已注册
-            if not await self.require_player_registration(event, user_id):
-                yield event.plain_result("❌ 玩家注册失败")
-                return
-            
-            player = await self.player_manager.get_player(user_id)
-            current_room = await self.room_manager.get_player_room(user_id)
-            
-            # 构建状态信息
-            status_lines = []
-            status_lines.append(f"👤 玩家状态 - {player.display_name}")
-            status_lines.append("=" * 30)
-            status_lines.append(f"💰 筹码: {player.chips:,}")
-            status_lines.append(f"⭐ 等级: {player.level}")
-            status_lines.append(f"🎲 总局数: {player.total_games}")
-            win_rate = (player.wins / max(player.total_games, 1)) * 100
-            status_lines.append(f"🏆 胜率: {win_rate:.1f}%")
-            
-            # 装备的成就信息
-            if player.equipped_achievement:
-                achievement_config = self.player_manager.achievements_config.get(player.equipped_achievement)
-                if achievement_config:
-                    status_lines.append(f"💎 装备成就: {achievement_config['icon']} {achievement_config['name']}")
-                else:
-                    status_lines.append(f"💎 装备成就: {player.equipped_achievement}")
-            else:
-                status_lines.append("💎 装备成就: 无")
-            
-            if current_room:
-                status_lines.append(f"🏠 当前房间: {current_room.room_id[:8]}")
-                status_lines.append(f"📊 房间状态: {current_room.status.name}")
-                if current_room.game:
-                    status_lines.append(f"🎲 游戏阶段: {current_room.game.game_phase.value}")
-            else:
-                status_lines.append("🏠 当前房间: 无")
-                
-            yield event.plain_result("\n".join(status_lines))
-            
-        except Exception as e:
-            async for result in self.handle_error(event, e, "查询状态"):
-                yield result
+        # 确保插件已初始化
+        if not await self.ensure_plugin_initialized():
+            yield event.plain_result("❌ 插件正在初始化，请稍后重试")
+            return
+            
+        # 同一用户的并发查询复用进行中的加载
+        future = self._status_inflight.get(user_id)
+        if future is None:
+            future = asyncio.ensure_future(self._load_status(event, user_id))
+            self._status_inflight[user_id] = future
+            future.add_done_callback(lambda _f: self._status_inflight.pop(user_id, None))
+        player, current_room = await asyncio.shield(future)
+        if not player:
+            yield event.plain_result("❌ 玩家注册失败")
+            return
+        
+        # 房间指纹：房间、房间状态或游戏阶段变化时缓存自动失效
+        if current_room:
+            fingerprint = (current_room.room_id, current_room.status,
+                           current_room.game.game_phase if current_room.game else None)
+        else:
+            fingerprint = ()
+        now = time.time()
+        cached = self._status_cache.get(user_id)
+        if cached and cached[0] > now and cached[1] == fingerprint:
+            yield event.plain_result(cached[2])
+            return
+        
+        # 装备的成就信息
+        if player.equipped_achievement:
+            achievement_text = self.player_manager.achievement_labels.get(
+                player.equipped_achievement, player.equipped_achievement
+            )
+        else:
+            achievement_text = "无"
+        
+        # 房间信息
+        if current_room:
+            room_text = f"{current_room.short_id}\n📊 房间状态: {current_room.status.name}"
+            if current_room.game:
+                room_text += f"\n🎲 游戏阶段: {current_room.game.game_phase.value}"
+        else:
+            room_text = "无"
+        
+        win_rate = (player.wins / max(player.total_games, 1)) * 100
+        status_text = f"""👤 玩家状态 - {player.display_name}
+{self._SEP}
+💰 筹码: {player.chips:,}
+⭐ 等级: {player.level}
+🎲 总局数: {player.total_games}
+🏆 胜率: {win_rate:.1f}%
+💎 装备成就: {achievement_text}
+🏠 当前房间: {room_text}"""
+        self._status_cache[user_id] = (now + self.STATUS_CACHE_TTL, fingerprint, status_text)
+        yield event.plain_result(status_text)
 
     async def handle_start_game(self, event: AstrMessageEvent) -> AsyncGenerator:
         """处理开始游戏命令 - 委托给主插件"""
@@ -352,322 +599,134 @@ class GameCommandHandler(BaseCommandHandler):
         async for result in self.plugin.start_game(event):
             yield result
 
-    async def handle_game_call(self, event: AstrMessageEvent) -> AsyncGenerator:
-        """处理跟注命令"""
-        user_id = event.get_sender_id()
+    async def _dispatch_action(self, event: AstrMessageEvent, action: PlayerAction,
+                               prepare: Callable[[GameRoom, GamePlayer], Tuple[str, str, int]]) -> AsyncGenerator:
+        """
+        玩家操作的统一流程：回合检查 -> 操作专属校验 -> 执行操作 -> 操作后状态提示
         
-        try:
-            if not await self.ensure_plugin_initialized():
-                yield event.plain_result("❌ 插件正在初始化，请稍后重试")
-                return
-                
-            if not await self.require_player_registration(event, user_id):
-                yield event.plain_result("❌ 玩家注册失败")
-                return
-            
-            # 检查玩家是否在房间中
-            room = await self.room_manager.get_player_room(user_id)
-            if not room:
-                yield event.plain_result("❌ 您当前不在任何房间中")
-                return
-            
-            # 检查游戏是否在进行
-            if not room.game or room.game.is_game_over():
-                yield event.plain_result("❌ 当前没有进行中的游戏")
-                return
-            
-            # 检查是否轮到该玩家
-            if room.game.current_player_id != user_id:
-                current_player = room.game.players.get(room.game.current_player_id)
-                if current_player:
-                    yield event.plain_result(f"❌ 还没轮到您，当前是 {current_player.display_name} 的回合")
-                else:
-                    yield event.plain_result("❌ 还没轮到您")
-                return
+        Args:
+            event: 消息事件对象
+            action: 玩家操作
+            prepare: 操作专属校验，返回 (错误信息, 成功提示, 操作金额)，错误信息为空表示校验通过
+        """
+        user_id = self._sender_id(event)
+        
+        room, player, turn_error = await self._resolve_active_turn(event, user_id)
+        if turn_error:
+            yield event.plain_result(turn_error)
+            return
+        
+        error, success_text, amount = prepare(room, player)
+        if error:
+            yield event.plain_result(error)
+            return
+        
+        success = await room.game.handle_player_action(user_id, action, amount)
+        
+        if success:
+            self.invalidate_status_cache(user_id)
+            yield event.plain_result(success_text)
             
-            # 执行跟注
-            player = room.game.players[user_id]
+            # 检查游戏状态并给出相应提示
+            async for result in self._handle_post_action_status(event, room):
+                yield result
+        else:
+            yield event.plain_result(f"❌ {_ACTION_NAMES[action]}操作失败")
+
+    @error_boundary("跟注")
+    async def handle_game_call(self, event: AstrMessageEvent) -> AsyncGenerator:
+        """处理跟注命令"""
+        def prepare(room: GameRoom, player: GamePlayer) -> Tuple[str, str, int]:
             call_amount = room.game.current_bet - player.current_bet
-            
             if call_amount <= 0:
-                yield event.plain_result("❌ 无需跟注，您可以选择过牌或加注")
-                return
-            
+                return "❌ 无需跟注，您可以选择过牌或加注", "", 0
             if player.chips < call_amount:
-                yield event.plain_result(f"❌ 筹码不足！需要 {call_amount}，但您只有 {player.chips}")
-                return
-            
-            # 执行跟注动作
-            success = await room.game.handle_player_action(user_id, PlayerAction.CALL)
-            
-            if success:
-                yield event.plain_result(f"✅ {player.display_name} 跟注 {call_amount}")
-                
-                # 检查游戏状态并给出相应提示
-                async for result in self._handle_post_action_status(event, room):
-                    yield result
-            else:
-                yield event.plain_result("❌ 跟注操作失败")
-                    
-        except Exception as e:
-            async for result in self.handle_error(event, e, "跟注"):
-                yield result
+                return f"❌ 筹码不足！需要 {call_amount}，但您只有 {player.chips}", "", 0
+            return "", f"✅ {player.display_name} 跟注 {call_amount}", 0
+        
+        async for result in self._dispatch_action(event, PlayerAction.CALL, prepare):
+            yield result
 
+    @error_boundary("加注")
     async def handle_game_raise(self, event: AstrMessageEvent, amount: int = None) -> AsyncGenerator:
         """处理加注命令"""
-        user_id = event.get_sender_id()
-        
-        try:
-            if not await self.ensure_plugin_initialized():
-                yield event.plain_result("❌ 插件正在初始化，请稍后重试")
-                return
-                
-            if not await self.require_player_registration(event, user_id):
-                yield event.plain_result("❌ 玩家注册失败")
-                return
-            
-            # 检查玩家是否在房间中
-            room = await self.room_manager.get_player_room(user_id)
-            if not room:
-                yield event.plain_result("❌ 您当前不在任何房间中")
-                return
-            
-            # 检查游戏是否在进行
-            if not room.game or room.game.is_game_over():
-                yield event.plain_result("❌ 当前没有进行中的游戏")
-                return
-            
-            # 检查是否轮到该玩家
-            if room.game.current_player_id != user_id:
-                current_player = room.game.players.get(room.game.current_player_id)
-                if current_player:
-                    yield event.plain_result(f"❌ 还没轮到您，当前是 {current_player.display_name} 的回合")
-                else:
-                    yield event.plain_result("❌ 还没轮到您")
-                return
-            
+        def prepare(room: GameRoom, player: GamePlayer) -> Tuple[str, str, int]:
             # 确定加注金额（"加注到"逻辑）
-            player = room.game.players[user_id]
-            current_call_amount = room.game.current_bet - player.current_bet
-            
-            if amount is None:
-                # 默认最小加注：当前最高下注 + 大盲注
-                min_raise_to = room.game.current_bet + room.game.big_blind
-                amount = min_raise_to
+            current_bet = room.game.current_bet
+            # 最小加注：当前最高下注 + 大盲注
+            min_raise_to = current_bet + room.game.big_blind
+            raise_to = min_raise_to if amount is None else amount
             
             # 验证加注金额
-            if amount <= room.game.current_bet:
-                yield event.plain_result(f"❌ 加注金额必须大于当前最高下注 {room.game.current_bet}")
-                yield event.plain_result(f"💡 最小加注到: {room.game.current_bet + room.game.big_blind}")
-                return
+            if raise_to <= current_bet:
+                return (f"❌ 加注金额必须大于当前最高下注 {current_bet}\n"
+                        f"💡 最小加注到: {min_raise_to}"), "", 0
             
             # 计算玩家需要投入的总筹码（加注金额 - 已下注金额）
-            total_needed = amount - player.current_bet
-            
+            total_needed = raise_to - player.current_bet
             if player.chips < total_needed:
-                yield event.plain_result(f"❌ 筹码不足！加注到 {amount} 需要额外投入 {total_needed}，但您只有 {player.chips}")
-                return
-            
-            # 记录操作前的当前下注额（用于计算增量）
-            old_current_bet = room.game.current_bet
+                return f"❌ 筹码不足！加注到 {raise_to} 需要额外投入 {total_needed}，但您只有 {player.chips}", "", 0
             
-            # 执行加注动作
-            success = await room.game.handle_player_action(user_id, PlayerAction.RAISE, amount)
-            
-            if success:
-                # 计算实际加注的增量（新的下注额 - 旧的下注额）
-                raise_increase = amount - old_current_bet
-                yield event.plain_result(f"🔥 {player.display_name} 加注到 {amount} (增加 {raise_increase})")
-                
-                # 检查游戏状态并给出相应提示
-                async for result in self._handle_post_action_status(event, room):
-                    yield result
-            else:
-                yield event.plain_result("❌ 加注操作失败")
-                    
-        except Exception as e:
-            async for result in self.handle_error(event, e, "加注"):
-                yield result
+            # 实际加注的增量（新的下注额 - 操作前的下注额）
+            raise_increase = raise_to - current_bet
+            return "", f"🔥 {player.display_name} 加注到 {raise_to} (增加 {raise_increase})", raise_to
+        
+        async for result in self._dispatch_action(event, PlayerAction.RAISE, prepare):
+            yield result
 
+    @error_boundary("弃牌")
     async def handle_game_fold(self, event: AstrMessageEvent) -> AsyncGenerator:
         """处理弃牌命令"""
-        user_id = event.get_sender_id()
+        def prepare(room: GameRoom, player: GamePlayer) -> Tuple[str, str, int]:
+            return "", f"🚫 {player.display_name} 弃牌", 0
         
-        try:
-            if not await self.ensure_plugin_initialized():
-                yield event.plain_result("❌ 插件正在初始化，请稍后重试")
-                return
-                
-            if not await self.require_player_registration(event, user_id):
-                yield event.plain_result("❌ 玩家注册失败")
-                return
-            
-            # 检查玩家是否在房间中
-            room = await self.room_manager.get_player_room(user_id)
-            if not room:
-                yield event.plain_result("❌ 您当前不在任何房间中")
-                return
-            
-            # 检查游戏是否在进行
-            if not room.game or room.game.is_game_over():
-                yield event.plain_result("❌ 当前没有进行中的游戏")
-                return
-            
-            # 检查是否轮到该玩家
-            if room.game.current_player_id != user_id:
-                current_player = room.game.players.get(room.game.current_player_id)
-                if current_player:
-                    yield event.plain_result(f"❌ 还没轮到您，当前是 {current_player.display_name} 的回合")
-                else:
-                    yield event.plain_result("❌ 还没轮到您")
-                return
-            
-            # 执行弃牌动作
-            player = room.game.players[user_id]
-            success = await room.game.handle_player_action(user_id, PlayerAction.FOLD)
-            
-            if success:
-                yield event.plain_result(f"🚫 {player.display_name} 弃牌")
-                
-                # 检查游戏状态并给出相应提示
-                async for result in self._handle_post_action_status(event, room):
-                    yield result
-            else:
-                yield event.plain_result("❌ 弃牌操作失败")
-                    
-        except Exception as e:
-            async for result in self.handle_error(event, e, "弃牌"):
-                yield result
+        async for result in self._dispatch_action(event, PlayerAction.FOLD, prepare):
+            yield result
 
+    @error_boundary("过牌")
     async def handle_game_check(self, event: AstrMessageEvent) -> AsyncGenerator:
         """处理过牌命令"""
-        user_id = event.get_sender_id()
-        
-        try:
-            if not await self.ensure_plugin_initialized():
-                yield event.plain_result("❌ 插件正在初始化，请稍后重试")
-                return
-                
-            if not await self.require_player_registration(event, user_id):
-                yield event.plain_result("❌ 玩家注册失败")
-                return
-            
-            # 检查玩家是否在房间中
-            room = await self.room_manager.get_player_room(user_id)
-            if not room:
-                yield event.plain_result("❌ 您当前不在任何房间中")
-                return
-            
-            # 检查游戏是否在进行
-            if not room.game or room.game.is_game_over():
-                yield event.plain_result("❌ 当前没有进行中的游戏")
-                return
-            
-            # 检查是否轮到该玩家
-            if room.game.current_player_id != user_id:
-                current_player = room.game.players.get(room.game.current_player_id)
-                if current_player:
-                    yield event.plain_result(f"❌ 还没轮到您，当前是 {current_player.display_name} 的回合")
-                else:
-                    yield event.plain_result("❌ 还没轮到您")
-                return
-            
+        def prepare(room: GameRoom, player: GamePlayer) -> Tuple[str, str, int]:
             # 检查是否可以过牌
-            player = room.game.players[user_id]
-            if room.game.current_bet > player.current_bet:
-                call_amount = room.game.current_bet - player.current_bet
-                yield event.plain_result(f"❌ 无法过牌，需要跟注 {call_amount} 或弃牌")
-                return
-            
-            # 执行过牌动作
-            success = await room.game.handle_player_action(user_id, PlayerAction.CHECK)
-            
-            if success:
-                yield event.plain_result(f"✋ {player.display_name} 过牌")
-                
-                # 检查游戏状态并给出相应提示
-                async for result in self._handle_post_action_status(event, room):
-                    yield result
-            else:
-                yield event.plain_result("❌ 过牌操作失败")
-                    
-        except Exception as e:
-            async for result in self.handle_error(event, e, "过牌"):
-                yield result
+            call_amount = room.game.current_bet - player.current_bet
+            if call_amount > 0:
+                return f"❌ 无法过牌，需要跟注 {call_amount} 或弃牌", "", 0
+            return "", f"✋ {player.display_name} 过牌", 0
+        
+        async for result in self._dispatch_action(event, PlayerAction.CHECK, prepare):
+            yield result
 
+    @error_boundary("全押")
     async def handle_game_allin(self, event: AstrMessageEvent) -> AsyncGenerator:
         """处理全押命令"""
-        user_id = event.get_sender_id()
-        
-        try:
-            if not await self.ensure_plugin_initialized():
-                yield event.plain_result("❌ 插件正在初始化，请稍后重试")
-                return
-                
-            if not await self.require_player_registration(event, user_id):
-                yield event.plain_result("❌ 玩家注册失败")
-                return
-            
-            # 检查玩家是否在房间中
-            room = await self.room_manager.get_player_room(user_id)
-            if not room:
-                yield event.plain_result("❌ 您当前不在任何房间中")
-                return
-            
-            # 检查游戏是否在进行
-            if not room.game or room.game.is_game_over():
-                yield event.plain_result("❌ 当前没有进行中的游戏")
-                return
-            
-            # 检查是否轮到该玩家
-            if room.game.current_player_id != user_id:
-                current_player = room.game.players.get(room.game.current_player_id)
-                if current_player:
-                    yield event.plain_result(f"❌ 还没轮到您，当前是 {current_player.display_name} 的回合")
-                else:
-                    yield event.plain_result("❌ 还没轮到您")
-                return
-            
-            # 执行全押动作
-            player = room.game.players[user_id]
+        def prepare(room: GameRoom, player: GamePlayer) -> Tuple[str, str, int]:
             if player.chips <= 0:
-                yield event.plain_result("❌ 您已经没有筹码了")
-                return
-            
+                return "❌ 您已经没有筹码了", "", 0
             all_in_amount = player.current_bet + player.chips
-            success = await room.game.handle_player_action(user_id, PlayerAction.ALL_IN)
-            
-            if success:
-                yield event.plain_result(f"🚀 {player.display_name} 全押！总下注: {all_in_amount}")
-                
-                # 检查游戏状态并给出相应提示
-                async for result in self._handle_post_action_status(event, room):
-                    yield result
-            else:
-                yield event.plain_result("❌ 全押操作失败")
-                    
-        except Exception as e:
-            async for result in self.handle_error(event, e, "全押"):
-                yield result
+            return "", f"🚀 {player.display_name} 全押！总下注: {all_in_amount}", 0
+        
+        async for result in self._dispatch_action(event, PlayerAction.ALL_IN, prepare):
+            yield result
     
     async def _handle_post_action_status(self, event: AstrMessageEvent, room) -> AsyncGenerator:
         """处理操作后的游戏状态提示"""
         try:
-            if room.game.game_phase == GamePhase.GAME_OVER:
+            phase = room.game.game_phase
+            if phase is GamePhase.GAME_OVER:
                 # 游戏结束，显示结算信息
                 async for result in self._handle_game_over(event, room):
                     yield result
-            elif room.game.game_phase == GamePhase.SHOWDOWN:
+            elif phase is GamePhase.SHOWDOWN:
                 # 摊牌阶段，显示最终结果
                 yield event.plain_result("🎯 进入摊牌阶段，计算结果中...")
                 async for result in self._handle_showdown(event, room):
                     yield result
-            elif room.game.game_phase != GamePhase.WAITING:
+            elif phase is not GamePhase.WAITING:
                 # 显示完整的游戏状态（包含公共牌、玩家状态等）
                 async for result in self._show_complete_game_status(event, room):
                     yield result
         except Exception as e:
-            logger.error(f"处理操作后状态时发生错误: {e}")
+            logger.error("处理操作后状态时发生错误: %s", e)
     
     async def _show_complete_game_status(self, event: AstrMessageEvent, room) -> AsyncGenerator:
         """显示完整的游戏状态"""
@@ -675,49 +734,50 @@ class GameCommandHandler(BaseCommandHandler):
             # 构建游戏状态信息
             status_lines = []
             status_lines.append("🎰 德州扑克游戏状态")
-            status_lines.append("=" * 40)
+            status_lines.append(_SEP_EQ)
+            
+            game = room.game
+            current_bet = game.current_bet
             
             # 房间和局数信息
-            status_lines.append(f"🏠 房间: {room.room_id[:8]}")
+            status_lines.append(f"🏠 房间: {room.short_id}")
             
             # 游戏阶段
-            phase_names = {
-                GamePhase.PRE_FLOP: "翻牌前",
-                GamePhase.FLOP: "翻牌后", 
-                GamePhase.TURN: "转牌后",
-                GamePhase.RIVER: "河牌后"
-            }
-            phase_name = phase_names.get(room.game.game_phase, "未知阶段")
-            status_lines.append(f"🎲 第{room.game.hand_number}局 - {phase_name}")
+            phase_name = _PHASE_NAMES.get(game.game_phase, "未知阶段")
+            status_lines.append(f"🎲 第{game.hand_number}局 - {phase_name}")
             
             # 底池和下注信息
-            status_lines.append(f"💰 底池: {room.game.main_pot}")
-            status_lines.append(f"💵 当前下注: {room.game.current_bet}")
+            status_lines.append(f"💰 底池: {game.main_pot}")
+            status_lines.append(f"💵 当前下注: {current_bet}")
             
             # 公共牌信息（如果有）
-            community_cards = room.game.get_community_cards()
-            if community_cards:
-                cards_str = " ".join(community_cards)
+            cards_str = game.format_community_cards()
+            if cards_str:
                 status_lines.append(f"🎴 公共牌: {cards_str}")
             
             status_lines.append("")
             status_lines.append("👥 玩家状态:")
-            status_lines.append("-" * 40)
+            status_lines.append(_SEP_DASH)
             
             # 玩家状态
-            current_player_id = room.game.current_player_id
-            for player_id, player in room.game.players.items():
+            current_player_id = game.current_player_id
+            current_short_id = current_player_id[-8:] if current_player_id else ""
+            current_player = None
+            for player_id, player in game.players.items():
                 if not player.is_in_hand():
                     continue
                     
                 # 玩家状态指示符
                 if player_id == current_player_id:
                     status_prefix = "👉  🟢"  # 当前行动玩家
+                    short_id = current_short_id
+                    current_player = player
                 else:
                     status_prefix = "    🟢"  # 其他玩家
+                    short_id = player_id[-8:]
                 
                 # 玩家基本信息
-                player_line = f"{status_prefix} {player_id[-8:]} 🎯 💰{player.chips}"
+                player_line = f"{status_prefix} {short_id} 🎯 💰{player.chips}"
                 
                 # 添加当前下注信息
                 if player.current_bet > 0:
@@ -725,68 +785,60 @@ class GameCommandHandler(BaseCommandHandler):
                 
                 # 添加最后操作
                 if player.last_action:
-                    action_names = {
-                        PlayerAction.FOLD: "弃牌",
-                        PlayerAction.CHECK: "过牌", 
-                        PlayerAction.CALL: "跟注",
-                        PlayerAction.RAISE: "加注",
-                        PlayerAction.ALL_IN: "全押"
-                    }
-                    action_name = action_names.get(player.last_action, str(player.last_action))
+                    action_name = _ACTION_NAMES.get(player.last_action, str(player.last_action))
                     player_line += f" [{action_name}]"
                 
                 status_lines.append(player_line)
             
             status_lines.append("")
             
-            # 当前行动玩家提示
-            if current_player_id:
-                current_player = room.game.players.get(current_player_id)
-                if current_player:
-                    status_lines.append(f"⏰ 等待 {current_player_id[-8:]}... 操作")
-                    
-                    # 显示可用操作
-                    actions = []
-                    
-                    # 判断能否跟注
-                    call_amount = room.game.current_bet - current_player.current_bet
-                    if call_amount > 0:
-                        actions.append(f"/poker_call (跟注{call_amount})")
-                    else:
-                        actions.append("/poker_check (过牌)")
-                    
-                    # 总是可以加注和弃牌
-                    actions.append("/poker_raise [金额] (加注到)")
-                    actions.append("/poker_fold (弃牌)")
-                    
-                    # 全押
-                    if current_player.chips > 0:
-                        actions.append("/poker_allin (全押)")
-                    
-                    status_lines.append(f"可用操作: {' | '.join(actions)}")
+            # 当前行动玩家提示（当前玩家已在上面的循环中取得）
+            if current_player:
+                status_lines.append(f"⏰ 等待 {current_short_id}... 操作")
+                
+                # 显示可用操作
+                actions = []
+                
+                # 判断能否跟注
+                call_amount = current_bet - current_player.current_bet
+                if call_amount > 0:
+                    actions.append(f"/poker_call (跟注{call_amount})")
+                else:
+                    actions.append("/poker_check (过牌)")
+                
+                # 总是可以加注和弃牌
+                actions.append("/poker_raise [金额] (加注到)")
+                actions.append("/poker_fold (弃牌)")
+                
+                # 全押
+                if current_player.chips > 0:
+                    actions.append("/poker_allin (全押)")
+                
+                status_lines.append(f"可用操作: {' | '.join(actions)}")
             
             # 输出所有状态信息
             yield event.plain_result("\n".join(status_lines))
             
         except Exception as e:
-            logger.error(f"显示完整游戏状态时发生错误: {e}")
+            logger.error("显示完整游戏状态时发生错误: %s", e)
             
     async def _handle_showdown(self, event: AstrMessageEvent, room) -> AsyncGenerator:
         """处理摊牌阶段"""
         try:
-            # 显示所有玩家的手牌和最终公共牌
-            community_cards = room.game.get_community_cards()
-            if community_cards:
-                cards_str = " ".join(community_cards)
-                yield event.plain_result(f"🎴 最终公共牌: {cards_str}")
+            # 显示所有玩家的手牌和最终公共牌（合并为一条消息发送）
+            showdown_lines = []
+            cards_str = room.game.format_community_cards()
+            if cards_str:
+                showdown_lines.append(f"🎴 最终公共牌: {cards_str}")
             
             # 显示每个玩家的手牌（还在牌局中的）
-            for player_id, player in room.game.players.items():
+            for player in room.game.players.values():
                 if player.is_in_hand() and player.hole_cards:
-                    hole_cards_str = " ".join([str(card) for card in player.hole_cards])
-                    yield event.plain_result(f"👤 {player.display_name}: {hole_cards_str}")
+                    hole_cards_str = " ".join([card.rendered for card in player.hole_cards])
+                    showdown_lines.append(f"👤 {player.display_name}: {hole_cards_str}")
             
-            yield event.plain_result("🔍 计算最佳牌型中...")
+            showdown_lines.append("🔍 计算最佳牌型中...")
+            yield event.plain_result("\n".join(showdown_lines))
             
         except Exception as e:
             logger.error(f"处理摊牌阶段时发生错误: {e}")
@@ -798,59 +850,36 @@ class GameCommandHandler(BaseCommandHandler):
             # 收集所有玩家信息和结算数据
             game_summary_lines = []
             game_summary_lines.append("🎉 游戏结束！")
-            game_summary_lines.append("=" * 40)
+            game_summary_lines.append(_SEP_EQ)
+            
+            game = room.game
             
             # 显示最终的牌型和结果
-            community_cards = room.game.get_community_cards()
-            if community_cards:
-                cards_str = " ".join(community_cards)
+            cards_str = game.format_community_cards()
+            if cards_str:
                 game_summary_lines.append(f"🎴 公共牌: {cards_str}")
                 game_summary_lines.append("")
             
             game_summary_lines.append("📊 最终结算:")
-            game_summary_lines.append("-" * 40)
-            
-            # 显示所有玩家的最终结果
-            winner_id = None
-            max_profit = float('-inf')
-            
-            if hasattr(room.game, 'game_results') and room.game.game_results:
-                for player_id, result in room.game.game_results.items():
-                    profit = result.get('profit', 0)
-                    
-                    # 获取玩家显示名称
-                    player = room.game.players.get(player_id)
-                    display_name = player.display_name if player else player_id[-8:]
-                    
-                    # 获取手牌信息（优先显示牌型，否则显示手牌）
-                    hand_desc = result.get('hand_description', '未知牌型')
-                    if hand_desc == '未知牌型':
-                        # 尝试显示玩家的手牌
-                        hand_cards = result.get('hand_cards', [])
-                        if hand_cards and len(hand_cards) == 2:
-                            hand_desc = f"手牌: {' '.join(hand_cards)}"
-                        else:
-                            # 如果都没有，尝试从游戏引擎获取
-                            if player and hasattr(player, 'hole_cards') and player.hole_cards:
-                                hand_desc = f"手牌: {' '.join([str(card) for card in player.hole_cards])}"
-                    
-                    # 记录最大盈利者
-                    if profit > max_profit:
-                        max_profit = profit
-                        winner_id = player_id
-                    
-                    # 构建玩家结算信息
-                    if profit > 0:
-                        game_summary_lines.append(f"🏆 {display_name}: +{profit} 筹码 | {hand_desc}")
-                    elif profit == 0:
-                        game_summary_lines.append(f"🤝 {display_name}: ±0 筹码 | {hand_desc}")
-                    else:
-                        game_summary_lines.append(f"💸 {display_name}: {profit} 筹码 | {hand_desc}")
+            game_summary_lines.append(_SEP_DASH)
+            
+            # 显示所有玩家的最终结果：一次遍历得到 (显示名称, 盈亏, 手牌描述)
+            game_results = getattr(game, 'game_results', None)
+            if game_results:
+                rows = []
+                for player_id, result in game_results.items():
+                    player = game.players.get(player_id)
+                    rows.append((
+                        player.display_name if player else player_id[-8:],
+                        result.get('profit', 0),
+                        _settlement_hand_desc(player, result),
+                    ))
                 
-                # 显示获胜信息
-                if winner_id and max_profit > 0:
-                    winner = room.game.players.get(winner_id)
-                    winner_name = winner.display_name if winner else winner_id[-8:]
+                game_summary_lines.extend(_settlement_line(*row) for row in rows)
+                
+                # 显示获胜信息（最大盈利者）
+                winner_name, max_profit, _ = max(rows, key=itemgetter(1))
+                if max_profit > 0:
                     game_summary_lines.append("")
                     game_summary_lines.append(f"🎊 恭喜 {winner_name} 获胜，赢得 {max_profit} 筹码！")
             
@@ -867,42 +896,66 @@ class GameCommandHandler(BaseCommandHandler):
             logger.error(f"处理游戏结束时发生错误: {e}")
             yield event.plain_result("❌ 游戏结算出现错误")
     
+    async def _finalize_player(self, player_id: str, result: Dict) -> Optional[PlayerInfo]:
+        """
+        结算单个玩家的牌局结果：更新筹码与统计（由调用方统一批量保存）
+        
+        Args:
+            player_id: 玩家ID
+            result: 该玩家的牌局结果
+            
+        Returns:
+            Optional[PlayerInfo]: 已更新的玩家信息，玩家不存在时返回None
+        """
+        self._stats_text_cache.pop(player_id, None)
+        self.invalidate_status_cache(player_id)
+        player_info = await self.player_manager.get_player(player_id)
+        if player_info:
+            # 更新筹码
+            old_chips = player_info.chips
+            profit = result.get('profit', 0)
+            player_info.chips = result.get('final_chips', old_chips + profit)
+            
+            # 更新统计数据
+            player_info.total_games += 1
+            if profit > 0:
+                player_info.wins += 1
+                if profit > player_info.largest_win:
+                    player_info.largest_win = profit
+            else:
+                player_info.losses += 1
+            
+            player_info.total_profit += profit
+            
+            # 更新最佳牌型
+            hand_eval = result.get('hand_evaluation')
+            if hand_eval:
+                self.player_manager.update_best_hand(player_info, hand_eval)
+            
+            logger.info("✅ 玩家 %s 数据更新完成：筹码 %s -> %s (变动: %+d)", player_id, old_chips, player_info.chips, profit)
+        return player_info
+    
     async def _update_players_after_game(self, room):
         """游戏结束后更新玩家数据并清理房间"""
         try:
-            # 更新玩家筹码和统计数据
-            if hasattr(room.game, 'game_results') and room.game.game_results:
-                for player_id, result in room.game.game_results.items():
-                    try:
-                        player_info = await self.player_manager.get_player(player_id)
-                        if player_info:
-                            # 更新筹码
-                            old_chips = player_info.chips
-                            profit = result.get('profit', 0)
-                            player_info.chips = result.get('final_chips', old_chips + profit)
-                            
-                            # 更新统计数据
-                            player_info.total_games += 1
-                            if profit > 0:
-                                player_info.wins += 1
-                                if profit > player_info.largest_win:
-                                    player_info.largest_win = profit
-                            else:
-                                player_info.losses += 1
-                            
-                            player_info.total_profit += profit
-                            
-                            # 更新最佳牌型
-                            hand_eval = result.get('hand_evaluation')
-                            if hand_eval and (not player_info.best_hand or hand_eval > player_info.best_hand):
-                                player_info.best_hand = str(hand_eval)
-                            
-                            # 保存玩家数据
-                            await self.player_manager.save_player(player_info)
-                            logger.info(f"✅ 玩家 {player_id} 数据更新完成：筹码 {old_chips} -> {player_info.chips} (变动: {profit:+})")
-                            
-                    except Exception as player_error:
-                        logger.error(f"更新玩家 {player_id} 数据时发生错误: {player_error}")
+            # 更新玩家筹码和统计数据（各玩家结算并发进行）
+            game_results = getattr(room.game, 'game_results', None)
+            if game_results:
+                player_ids = list(game_results)
+                outcomes = await asyncio.gather(
+                    *(self._finalize_player(pid, game_results[pid]) for pid in player_ids),
+                    return_exceptions=True
+                )
+                updated_players = []
+                for player_id, outcome in zip(player_ids, outcomes):
+                    if isinstance(outcome, Exception):
+                        logger.error("更新玩家 %s 数据时发生错误: %s", player_id, outcome)
+                    elif outcome:
+                        updated_players.append(outcome)
+                
+                # 一次事务保存所有结算玩家
+                await self.player_manager.save_many(updated_players)
+                self._leaderboard_cache.clear()
             
             # 清理房间 - 将所有玩家移出房间
             player_ids_to_remove = list(room.player_ids.copy())
@@ -910,275 +963,202 @@ class GameCommandHandler(BaseCommandHandler):
                 try:
                     # 确保玩家真正从房间中移除
                     if player_id in room.player_ids:
-                        room.player_ids.remove(player_id)
-                        logger.info(f"✅ 玩家 {player_id} 已从房间 {room.room_id[:8]} 的玩家列表移除")
+                        room.player_ids.pop(player_id, None)
+                        logger.info("✅ 玩家 %s 已从房间 %s 的玩家列表移除", player_id, room.short_id)
                     
                     # 从等待列表中也移除
-                    if player_id in room.waiting_list:
-                        room.waiting_list.remove(player_id)
-                        logger.info(f"✅ 玩家 {player_id} 已从房间等待列表移除")
+                    if room.remove_waiting(player_id):
+                        logger.info("✅ 玩家 %s 已从房间等待列表移除", player_id)
                     
                     # 从房间管理器的玩家映射中移除
-                    if hasattr(self.room_manager, 'player_room_mapping') and player_id in self.room_manager.player_room_mapping:
-                        del self.room_manager.player_room_mapping[player_id]
-                        logger.info(f"✅ 玩家 {player_id} 已从房间映射中移除")
+                    if self.room_manager.unmap_player(player_id) is not None:
+                        logger.info("✅ 玩家 %s 已从房间映射中移除", player_id)
                         
                 except Exception as remove_error:
-                    logger.error(f"从房间移除玩家 {player_id} 时发生错误: {remove_error}")
+                    logger.error("从房间移除玩家 %s 时发生错误: %s", player_id, remove_error)
             
-                # 完全销毁房间 - 增强房间清理逻辑
-                from ..models.room_manager import RoomStatus
-                try:
-                    # 设置房间状态为已结束
-                    room.status = RoomStatus.FINISHED
-                    room.current_players = 0
-                    room.game = None
-                    
-                    # 确保所有玩家状态都被重置
-                    room.player_ids.clear()
-                    room.waiting_list.clear()
-                    
-                    # 从房间管理器中移除房间
-                    if room.room_id in self.room_manager.rooms:
-                        del self.room_manager.rooms[room.room_id]
-                        logger.info(f"🗑️ 房间 {room.room_id[:8]} 已完全销毁")
-                    else:
-                        logger.warning(f"⚠️ 房间 {room.room_id[:8]} 不在房间管理器中")
-                    
-                    # 额外清理：确保房间映射表也被清理
-                    if hasattr(self.room_manager, 'player_room_mapping'):
-                        # 清理所有指向这个房间的映射
-                        keys_to_remove = []
-                        for player_id, mapped_room_id in self.room_manager.player_room_mapping.items():
-                            if mapped_room_id == room.room_id:
-                                keys_to_remove.append(player_id)
-                        
-                        for key in keys_to_remove:
-                            del self.room_manager.player_room_mapping[key]
-                            logger.info(f"🧹 清理玩家 {key} 的房间映射")
-                        
-                except Exception as destroy_error:
-                    logger.error(f"销毁房间时发生错误: {destroy_error}")
+            # 完全销毁房间 - 增强房间清理逻辑
+            try:
+                # 设置房间状态为已结束
+                self.room_manager.set_status(room, RoomStatus.FINISHED)
+                self.room_manager.release_game(room)
                 
-                logger.info(f"🏠 房间 {room.room_id[:8]} 彻底清理和销毁完成")
+                # 确保所有玩家状态都被重置
+                room.player_ids.clear()
+                room.clear_waiting()
+                
+                # 从房间管理器中销毁房间（同时清理所有指向这个房间的映射）
+                if self.room_manager.destroy_room(room.room_id):
+                    logger.info("🗑️ 房间 %s 已完全销毁", room.short_id)
+                else:
+                    logger.warning("⚠️ 房间 %s 不在房间管理器中", room.short_id)
+                    
+            except Exception as destroy_error:
+                logger.error("销毁房间时发生错误: %s", destroy_error)
+            
+            logger.info("🏠 房间 %s 彻底清理和销毁完成", room.short_id)
             
         except Exception as e:
-            logger.error(f"游戏结束后清理时发生错误: {e}")
+            logger.error("游戏结束后清理时发生错误: %s", e)
 
+    @error_boundary("查看成就")
     async def handle_achievements(self, event: AstrMessageEvent, page: int = 1) -> AsyncGenerator:
         """处理成就查看命令 - 支持翻页和详细进度显示"""
-        user_id = event.get_sender_id()
-        try:
-            if not await self.ensure_plugin_initialized():
-                yield event.plain_result("❌ 插件正在初始化，请稍后重试")
-                return
-                
-            if not await self.require_player_registration(event, user_id):
-                yield event.plain_result("❌ 玩家注册失败")
-                return
-            
-            # 获取成就进度数据
-            progress_data = await self.player_manager.get_achievement_progress(user_id)
-            if not progress_data:
-                yield event.plain_result("❌ 获取成就数据失败")
-                return
-                
-            # 分页设置
-            items_per_page = 8
-            unlocked = progress_data['unlocked']
-            locked = progress_data['locked']
-            all_achievements = unlocked + locked
-            
-            total_pages = (len(all_achievements) + items_per_page - 1) // items_per_page
-            page = max(1, min(page, total_pages))
-            
-            start_idx = (page - 1) * items_per_page
-            end_idx = start_idx + items_per_page
-            page_achievements = all_achievements[start_idx:end_idx]
-            
-            # 构建成就显示
-            achievement_lines = []
-            achievement_lines.append("🏆 成就系统")
-            achievement_lines.append("=" * 40)
-            
-            # 统计信息
-            achievement_lines.append(f"📊 成就统计: {len(unlocked)}/{len(all_achievements)} 已解锁")
-            
-            # 装备的成就信息
-            player = await self.player_manager.get_player(user_id)
-            if player and player.equipped_achievement:
-                equipped_info = None
-                for achievement in all_achievements:
-                    if achievement['id'] == player.equipped_achievement:
-                        equipped_info = achievement
-                        break
-                if equipped_info:
-                    achievement_lines.append(f"💎 装备中: {equipped_info['icon']} {equipped_info['name']}")
-            
+        user_id = self._sender_id(event)
+        if not await self.ensure_plugin_initialized():
+            yield event.plain_result("❌ 插件正在初始化，请稍后重试")
+            return
+            
+        if not await self.require_player_registration(event, user_id):
+            yield event.plain_result("❌ 玩家注册失败")
+            return
+        
+        # 获取成就进度数据
+        progress_data = await self.player_manager.get_achievement_progress(user_id)
+        if not progress_data:
+            yield event.plain_result("❌ 获取成就数据失败")
+            return
+            
+        # 分页设置
+        items_per_page = 8
+        all_achievements = progress_data['all']
+        
+        total_pages = (progress_data['total'] + items_per_page - 1) // items_per_page
+        page = max(1, min(page, total_pages))
+        
+        start_idx = (page - 1) * items_per_page
+        end_idx = start_idx + items_per_page
+        page_achievements = all_achievements[start_idx:end_idx]
+        
+        # 构建成就显示
+        achievement_lines = []
+        achievement_lines.append("🏆 成就系统")
+        achievement_lines.append(_SEP_EQ)
+        
+        # 统计信息
+        achievement_lines.append(f"📊 成就统计: {progress_data['unlocked_count']}/{progress_data['total']} 已解锁")
+        
+        # 装备的成就信息
+        player = await self.player_manager.get_player(user_id)
+        if player and player.equipped_achievement:
+            equipped_label = self.player_manager.achievement_labels.get(player.equipped_achievement)
+            if equipped_label:
+                achievement_lines.append(f"💎 装备中: {equipped_label}")
+        
+        achievement_lines.append("")
+        achievement_lines.append(f"📄 第 {page}/{total_pages} 页")
+        achievement_lines.append(_SEP_DASH)
+        
+        # 显示当前页的成就（已解锁显示ID，未解锁显示进度）
+        achievement_lines.extend(
+            _ACHIEVEMENT_ROW_UNLOCKED.format_map(achievement) if achievement['is_unlocked']
+            else _ACHIEVEMENT_ROW_LOCKED.format(
+                bar=self._create_progress_bar(achievement['progress_percent']), **achievement
+            )
+            for achievement in page_achievements
+        )
+        
+        # 翻页提示
+        if total_pages > 1:
+            achievement_lines.append("📖 翻页命令:")
+            if page > 1:
+                achievement_lines.append(f"    /poker_achievements {page-1} - 上一页")
+            if page < total_pages:
+                achievement_lines.append(f"    /poker_achievements {page+1} - 下一页")
             achievement_lines.append("")
-            achievement_lines.append(f"📄 第 {page}/{total_pages} 页")
-            achievement_lines.append("-" * 40)
-            
-            # 显示当前页的成就
-            for achievement in page_achievements:
-                icon = achievement['icon']
-                name = achievement['name']
-                desc = achievement['description']
-                achievement_id = achievement['id']
-                
-                # 修复成就解锁显示逻辑 - 检查progress_percent是否达到100%或is_unlocked
-                is_actually_unlocked = achievement['is_unlocked'] or achievement.get('progress_percent', 0) >= 100
-                
-                if is_actually_unlocked:
-                    # 已解锁的成就
-                    status_icon = "✅"
-                    progress_info = f"🆔 ID: {achievement_id} | 奖励: {achievement.get('reward', 0)} 筹码"
-                else:
-                    # 未解锁的成就 - 显示进度
-                    status_icon = "🔒"
-                    progress = achievement['current_progress']
-                    target = achievement['target']
-                    progress_percent = achievement['progress_percent']
-                    progress_bar = self._create_progress_bar(progress_percent)
-                    progress_info = f"进度: {progress}/{target} {progress_bar} {progress_percent:.1f}% | 奖励: {achievement.get('reward', 0)} 筹码"
-                
-                achievement_lines.append(f"{status_icon} {icon} {name}")
-                achievement_lines.append(f"    {desc}")
-                achievement_lines.append(f"    {progress_info}")
-                achievement_lines.append("")
-            
-            # 翻页提示
-            if total_pages > 1:
-                achievement_lines.append("📖 翻页命令:")
-                if page > 1:
-                    achievement_lines.append(f"    /poker_achievements {page-1} - 上一页")
-                if page < total_pages:
-                    achievement_lines.append(f"    /poker_achievements {page+1} - 下一页")
-                achievement_lines.append("")
-            
-            achievement_lines.append("💡 使用 /poker_equip [成就ID] 装备已解锁的成就")
-            
-            yield event.plain_result("\n".join(achievement_lines))
-            
-        except Exception as e:
-            async for result in self.handle_error(event, e, "查看成就"):
-                yield result
+        
+        achievement_lines.append("💡 使用 /poker_equip [成就ID] 装备已解锁的成就")
+        
+        yield event.plain_result("\n".join(achievement_lines))
                 
     def _create_progress_bar(self, progress_percent: float, length: int = 10) -> str:
         """创建进度条"""
-        filled = int(progress_percent * length / 100)
-        bar = "█" * filled + "░" * (length - filled)
-        return f"[{bar}]"
+        return _progress_bar(int(progress_percent * length / 100), length)
 
+    @error_boundary("装备成就")
     async def handle_equip_achievement(self, event: AstrMessageEvent, achievement_id: str = None) -> AsyncGenerator:
         """处理装备成就命令"""
-        try:
-            if not await self.ensure_plugin_initialized():
-                yield event.plain_result("❌ 插件正在初始化，请稍后重试")
-                return
-                
-            user_id = event.get_sender_id()
-            if not await self.require_player_registration(event, user_id):
-                yield event.plain_result("❌ 玩家注册失败")
-                return
-            
-            if not achievement_id:
-                yield event.plain_result("❌ 请指定要装备的成就ID\n💡 使用 /poker_achievements 查看可装备的成就")
-                return
-            
-            # 装备成就
-            success, message = await self.player_manager.equip_achievement(user_id, achievement_id)
-            
-            if success:
-                yield event.plain_result(f"✅ {message}")
-            else:
-                yield event.plain_result(f"❌ {message}")
-                
-        except Exception as e:
-            async for result in self.handle_error(event, e, "装备成就"):
-                yield result
+        if not await self.ensure_plugin_initialized():
+            yield event.plain_result("❌ 插件正在初始化，请稍后重试")
+            return
+            
+        user_id = self._sender_id(event)
+        if not await self.require_player_registration(event, user_id):
+            yield event.plain_result("❌ 玩家注册失败")
+            return
+        
+        if not achievement_id:
+            yield event.plain_result("❌ 请指定要装备的成就ID\n💡 使用 /poker_achievements 查看可装备的成就")
+            return
+        
+        # 装备成就
+        success, message = await self.player_manager.equip_achievement(user_id, achievement_id)
+        
+        if success:
+            # 装备成就会出现在状态和排行榜展示中，使对应缓存失效
+            self.invalidate_status_cache(user_id)
+            self._leaderboard_cache.clear()
+            yield event.plain_result(f"✅ {message}")
+        else:
+            yield event.plain_result(f"❌ {message}")
 
             
+    @error_boundary("查看排行榜")
     async def handle_leaderboard(self, event: AstrMessageEvent, page: int = 1) -> AsyncGenerator:
         """处理排行榜查看命令"""
-        try:
-            if not await self.ensure_plugin_initialized():
-                yield event.plain_result("❌ 插件正在初始化，请稍后重试")
-                return
-            
-            # 获取排行榜数据 - 按胜率排序
-            leaderboard = await self.player_manager.get_leaderboard('winrate', limit=1000)  # 获取所有玩家
-            
-            if not leaderboard:
-                yield event.plain_result("📋 暂无排行榜数据")
-                return
-            
-            # 分页设置
-            items_per_page = 10
-            total_pages = (len(leaderboard) + items_per_page - 1) // items_per_page
-            page = max(1, min(page, total_pages))
-            
-            start_idx = (page - 1) * items_per_page
-            end_idx = start_idx + items_per_page
-            page_players = leaderboard[start_idx:end_idx]
-            
-            # 构建排行榜显示
-            leaderboard_lines = []
-            leaderboard_lines.append("🏆 德州扑克排行榜")
-            leaderboard_lines.append("=" * 40)
-            leaderboard_lines.append(f"📊 总玩家数: {len(leaderboard)}")
-            leaderboard_lines.append(f"📄 第 {page}/{total_pages} 页")
-            leaderboard_lines.append("-" * 40)
-            
-            for i, (rank, player_info) in enumerate(page_players, start=start_idx + 1):
-                # 计算胜率
-                winrate = (player_info.wins / max(player_info.total_games, 1)) * 100
-                
-                # 排名图标
-                if rank == 1:
-                    rank_icon = "🥇"
-                elif rank == 2:
-                    rank_icon = "🥈"
-                elif rank == 3:
-                    rank_icon = "🥉"
-                else:
-                    rank_icon = f"{rank:2d}."
-                
-                # 玩家信息
-                player_line = f"{rank_icon} {player_info.display_name or player_info.player_id[-8:]}"
-                stats_line = f"    💰{player_info.chips:,} | 🎲{player_info.total_games} | 🏆{winrate:.1f}% | ⭐{len(player_info.achievements)}"
-                
-                # 装备的成就
-                if player_info.equipped_achievement:
-                    achievement_config = self.player_manager.achievements_config.get(player_info.equipped_achievement)
-                    if achievement_config:
-                        equipped_line = f"    💎 {achievement_config['icon']} {achievement_config['name']}"
-                    else:
-                        equipped_line = f"    💎 {player_info.equipped_achievement}"
-                else:
-                    equipped_line = "    💎 无装备成就"
-                
-                leaderboard_lines.append(player_line)
-                leaderboard_lines.append(stats_line)
-                leaderboard_lines.append(equipped_line)
-                leaderboard_lines.append("")
-            
-            # 翻页提示
-            if total_pages > 1:
-                leaderboard_lines.append("📖 翻页命令:")
-                if page > 1:
-                    leaderboard_lines.append(f"    /poker_leaderboard {page-1} - 上一页")
-                if page < total_pages:
-                    leaderboard_lines.append(f"    /poker_leaderboard {page+1} - 下一页")
-                leaderboard_lines.append("")
-            
-            leaderboard_lines.append("📝 说明: 💰筹码 | 🎲总局数 | 🏆胜率 | ⭐成就数")
-            
-            yield event.plain_result("\n".join(leaderboard_lines))
-            
-        except Exception as e:
-            async for result in self.handle_error(event, e, "查看排行榜"):
-                yield result
+        if not await self.ensure_plugin_initialized():
+            yield event.plain_result("❌ 插件正在初始化，请稍后重试")
+            return
+        
+        cache_key = ('winrate', page)
+        cached = self._leaderboard_cache.get(cache_key)
+        if cached and time.monotonic() - cached[0] < self.LEADERBOARD_CACHE_TTL:
+            yield event.plain_result(cached[1])
+            return
+        
+        # 先统计上榜人数，只取当前页数据 - 按胜率排序
+        total_players = await self.player_manager.get_leaderboard_count()
+        
+        if not total_players:
+            yield event.plain_result("📋 暂无排行榜数据")
+            return
+        
+        # 分页设置
+        items_per_page = 10
+        total_pages = (total_players + items_per_page - 1) // items_per_page
+        page = max(1, min(page, total_pages))
+        
+        start_idx = (page - 1) * items_per_page
+        page_players = await self.player_manager.get_leaderboard('winrate', limit=items_per_page, offset=start_idx)
+        
+        # 构建排行榜显示
+        leaderboard_lines = []
+        leaderboard_lines.append("🏆 德州扑克排行榜")
+        leaderboard_lines.append(_SEP_EQ)
+        leaderboard_lines.append(f"📊 总玩家数: {total_players}")
+        leaderboard_lines.append(f"📄 第 {page}/{total_pages} 页")
+        leaderboard_lines.append(_SEP_DASH)
+        
+        # 每名玩家一个显示块（末尾换行与 join 共同形成块间空行）
+        achievement_labels = self.player_manager.achievement_labels
+        leaderboard_lines.extend(
+            _leaderboard_row(rank, player_info, achievement_labels) for rank, player_info in page_players
+        )
+        
+        # 翻页提示
+        if total_pages > 1:
+            leaderboard_lines.append("📖 翻页命令:")
+            if page > 1:
+                leaderboard_lines.append(f"    /poker_leaderboard {page-1} - 上一页")
+            if page < total_pages:
+                leaderboard_lines.append(f"    /poker_leaderboard {page+1} - 下一页")
+            leaderboard_lines.append("")
+        
+        leaderboard_lines.append("📝 说明: 💰筹码 | 🎲总局数 | 🏆胜率 | ⭐成就数")
+        
+        leaderboard_text = "\n".join(leaderboard_lines)
+        self._leaderboard_cache[cache_key] = (time.monotonic(), leaderboard_text)
+        yield event.plain_result(leaderboard_text)
 
     async def handle_emergency_exit(self, event: AstrMessageEvent) -> AsyncGenerator:
         """处理紧急退出命令"""
@@ -1187,7 +1167,7 @@ class GameCommandHandler(BaseCommandHandler):
             if not await self.ensure_plugin_initialized(event):
                 return
                 
-            user_id = event.get_sender_id()
+            user_id = self._sender_id(event)
             
             # 检查用户是否在房间中
             if not hasattr(self.plugin.room_manager, 'player_room_mapping'):
@@ -1213,22 +1193,15 @@ class GameCommandHandler(BaseCommandHandler):
                     logger.info(f"紧急退出：强制结束房间 {room_id[:8]} 的游戏")
                 
                 # 移除玩家
-                if user_id in room.player_ids:
-                    room.player_ids.remove(user_id)
-                if user_id in room.waiting_list:
-                    room.waiting_list.remove(user_id)
+                room.player_ids.pop(user_id, None)
+                room.remove_waiting(user_id)
                 
                 # 从房间映射中移除
-                if user_id in self.plugin.room_manager.player_room_mapping:
-                    del self.plugin.room_manager.player_room_mapping[user_id]
-                
-                # 更新房间状态
-                room.current_players = len(room.player_ids)
+                self.plugin.room_manager.unmap_player(user_id)
                 
                 # 如果房间没有玩家了，销毁房间
                 if room.current_players == 0:
-                    if room_id in self.plugin.room_manager.rooms:
-                        del self.plugin.room_manager.rooms[room_id]
+                    self.plugin.room_manager.destroy_room(room_id)
                     logger.info(f"紧急退出：已销毁空房间 {room_id[:8]}")
                 
                 yield event.plain_result(f"✅ 已强制退出房间 {room_id[:8]}")
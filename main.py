@@ -19,6 +19,7 @@ from .models.player_manager import PlayerManager, PlayerInfo
 from .models.room_manager import RoomManager, GameRoom, RoomStatus
 from .utils.data_persistence import DatabaseManager
 from .utils.ui_builder import GameUIBuilder
+from .handlers.base_handler import BaseCommandHandler
 
 
 def handle_plugin_exception(operation_name: str):
@@ -44,6 +45,28 @@ def handle_plugin_exception(operation_name: str):
     return decorator
 
 
+def admin_single_flight(func: Callable):
+    """
+    管理员命令并发限制装饰器：同一用户同一时间只执行一条管理员命令
+    
+    Args:
+        func: 命令处理函数
+        
+    Returns:
+        包装后的命令处理函数
+    """
+    @functools.wraps(func)
+    async def wrapper(self, event, *args, **kwargs):
+        lock = self._admin_inflight.setdefault(event.get_sender_id(), asyncio.Lock())
+        if lock.locked():
+            yield event.plain_result("🔁 请等待上一条指令完成")
+            return
+        async with lock:
+            async for result in func(self, event, *args, **kwargs):
+                yield result
+    return wrapper
+
+
 @register("texas_holdem", "山萘", "德州扑克游戏插件 - 支持多人游戏、积分系统、房间管理", "1.1.0")
 class TexasHoldemPlugin(Star):
     """
@@ -92,6 +115,9 @@ class TexasHoldemPlugin(Star):
         # 记录插件启动时间
         self.start_time = time.time()
         
+        # 管理员命令执行中的锁（按用户），防止同一管理员的重型命令叠加执行
+        self._admin_inflight: Dict[str, asyncio.Lock] = {}
+        
         # 初始化命令处理器（新架构预览）
         self._init_command_handlers()
         
@@ -560,15 +586,8 @@ class TexasHoldemPlugin(Star):
                 yield event.plain_result("❌ 至少需要2名玩家才能开始游戏")
                 return
             
-            # 初始化游戏（如果还没有）
-            if not room.game:
-                from .models.game_engine import TexasHoldemGame
-                room.game = TexasHoldemGame(
-                    room_id=room.room_id,
-                    small_blind=room.small_blind,
-                    big_blind=room.big_blind,
-                    max_players=room.max_players
-                )
+            # 初始化游戏（如果还没有），已买入的玩家随之入座
+            await self.room_manager.ensure_game(room)
             
             # 确保所有房间玩家都在游戏中
             for player_id in room.player_ids:
@@ -779,6 +798,7 @@ class TexasHoldemPlugin(Star):
     
     @filter.command("poker_admin")
     @filter.permission_type(filter.PermissionType.ADMIN)
+    @admin_single_flight
     async def admin_panel(self, event: AstrMessageEvent) -> AsyncGenerator:
         """
         管理员主面板
@@ -800,6 +820,7 @@ class TexasHoldemPlugin(Star):
 
     @filter.command("poker_admin_players")
     @filter.permission_type(filter.PermissionType.ADMIN)
+    @admin_single_flight
     async def admin_players(self, event: AstrMessageEvent, limit: int = 20) -> AsyncGenerator:
         """
         查看玩家列表
@@ -848,6 +869,7 @@ class TexasHoldemPlugin(Star):
 
     @filter.command("poker_admin_ban")
     @filter.permission_type(filter.PermissionType.ADMIN)
+    @admin_single_flight
     async def admin_ban_player(self, event: AstrMessageEvent, player_id: str, duration: int = 0, reason: str = "管理员操作") -> AsyncGenerator:
         """
         封禁玩家
@@ -870,6 +892,7 @@ class TexasHoldemPlugin(Star):
             success = await self.player_manager.ban_player(player_id, reason, duration)
             
             if success:
+                BaseCommandHandler.invalidate_ban_cache(player_id)
                 duration_str = f"{duration}小时" if duration > 0 else "永久"
                 yield event.plain_result(f"✅ 已封禁玩家 {player_id[:12]}\n⏰ 时长: {duration_str}\n📝 原因: {reason}")
                 
@@ -887,6 +910,7 @@ class TexasHoldemPlugin(Star):
 
     @filter.command("poker_admin_unban")
     @filter.permission_type(filter.PermissionType.ADMIN)
+    @admin_single_flight
     async def admin_unban_player(self, event: AstrMessageEvent, player_id: str) -> AsyncGenerator:
         """
         解封玩家
@@ -906,6 +930,7 @@ class TexasHoldemPlugin(Star):
             success = await self.player_manager.unban_player(player_id)
             
             if success:
+                BaseCommandHandler.invalidate_ban_cache(player_id)
                 yield event.plain_result(f"✅ 已解封玩家 {player_id[:12]}")
             else:
                 yield event.plain_result(f"❌ 解封失败，玩家不存在或未被封禁: {player_id}")
@@ -916,6 +941,7 @@ class TexasHoldemPlugin(Star):
 
     @filter.command("poker_admin_addchips")
     @filter.permission_type(filter.PermissionType.ADMIN)
+    @admin_single_flight
     async def admin_add_chips(self, event: AstrMessageEvent, player_id: str, amount: int, reason: str = "管理员补充") -> AsyncGenerator:
         """
         给玩家增加筹码
@@ -946,6 +972,7 @@ class TexasHoldemPlugin(Star):
             success = await self.player_manager.add_chips(player_id, amount, reason)
             
             if success:
+                self._invalidate_player_caches(player_id)
                 player = await self.player_manager.get_or_create_player(player_id)
                 action_text = "增加" if amount > 0 else "扣除"
                 yield event.plain_result(f"✅ 已{action_text}玩家 {player_id[:12]} 筹码 {abs(amount):,}\n💰 当前筹码: {player.chips:,}\n📝 原因: {reason}")
@@ -958,6 +985,7 @@ class TexasHoldemPlugin(Star):
 
     @filter.command("poker_admin_reset")
     @filter.permission_type(filter.PermissionType.ADMIN)
+    @admin_single_flight
     async def admin_reset_player(self, event: AstrMessageEvent, player_id: str, keep_chips: bool = False) -> AsyncGenerator:
         """
         重置玩家数据
@@ -979,6 +1007,8 @@ class TexasHoldemPlugin(Star):
             success = await self.player_manager.reset_player_data(player_id, keep_chips)
             
             if success:
+                BaseCommandHandler.invalidate_ban_cache(player_id)
+                self._invalidate_player_caches(player_id)
                 chips_text = "保留筹码" if keep_chips else "重置筹码"
                 yield event.plain_result(f"✅ 已重置玩家 {player_id[:12]} 的数据\n📊 {chips_text}")
                 
@@ -996,6 +1026,7 @@ class TexasHoldemPlugin(Star):
 
     @filter.command("poker_admin_rooms")
     @filter.permission_type(filter.PermissionType.ADMIN)
+    @admin_single_flight
     async def admin_rooms(self, event: AstrMessageEvent) -> AsyncGenerator:
         """
         查看所有房间状态
@@ -1048,6 +1079,7 @@ class TexasHoldemPlugin(Star):
 
     @filter.command("poker_admin_close")
     @filter.permission_type(filter.PermissionType.ADMIN)
+    @admin_single_flight
     async def admin_close_room(self, event: AstrMessageEvent, room_id: str, reason: str = "管理员关闭") -> AsyncGenerator:
         """
         强制关闭房间
@@ -1085,6 +1117,7 @@ class TexasHoldemPlugin(Star):
 
     @filter.command("poker_admin_kick")
     @filter.permission_type(filter.PermissionType.ADMIN)
+    @admin_single_flight
     async def admin_kick_player(self, event: AstrMessageEvent, player_id: str, reason: str = "管理员操作") -> AsyncGenerator:
         """
         踢出玩家
@@ -1115,6 +1148,7 @@ class TexasHoldemPlugin(Star):
 
     @filter.command("poker_admin_stats")
     @filter.permission_type(filter.PermissionType.ADMIN)
+    @admin_single_flight
     async def admin_detailed_stats(self, event: AstrMessageEvent) -> AsyncGenerator:
         """
         详细系统统计
@@ -1167,6 +1201,7 @@ class TexasHoldemPlugin(Star):
 
     @filter.command("poker_admin_backup")
     @filter.permission_type(filter.PermissionType.ADMIN)
+    @admin_single_flight
     async def admin_backup(self, event: AstrMessageEvent) -> AsyncGenerator:
         """
         备份数据库
@@ -1201,6 +1236,7 @@ class TexasHoldemPlugin(Star):
 
     @filter.command("poker_admin_config")
     @filter.permission_type(filter.PermissionType.ADMIN)
+    @admin_single_flight
     async def admin_config(self, event: AstrMessageEvent) -> AsyncGenerator:
         """
         查看系统配置
@@ -1237,6 +1273,7 @@ class TexasHoldemPlugin(Star):
 
     @filter.command("poker_admin_banned")
     @filter.permission_type(filter.PermissionType.ADMIN)
+    @admin_single_flight
     async def admin_banned_list(self, event: AstrMessageEvent, page: int = 1) -> AsyncGenerator:
         """查看封禁玩家列表（委托给handler处理）"""
         if self.admin_handler:
@@ -1390,6 +1427,16 @@ class TexasHoldemPlugin(Star):
             # 强制重置房间，避免卡死
             await self._auto_cleanup_room(room)
     
+    def _invalidate_player_caches(self, player_id: str):
+        """
+        玩家数据变化后，使游戏命令处理器中该玩家相关的展示缓存失效
+        
+        Args:
+            player_id: 玩家ID
+        """
+        if self.game_handler:
+            self.game_handler.invalidate_player_caches(player_id)
+
     async def _update_player_stats_on_game_end(self, results: dict):
         """
         游戏结束时更新玩家统计数据
@@ -1407,6 +1454,7 @@ class TexasHoldemPlugin(Star):
                 await self.player_manager.update_game_result(
                     player_id, profit, won, hand_evaluation
                 )
+                self._invalidate_player_caches(player_id)
                 
                 # 获取玩家当前筹码（包括成就奖励等）
                 player = await self.player_manager.get_or_create_player(player_id)
@@ -1489,7 +1537,7 @@ class TexasHoldemPlugin(Star):
     async def _save_player_data_on_game_end(self):
         """保存游戏结束时的玩家数据"""
         try:
-            await self.player_manager.save_all_players()
+            await self.player_manager.schedule_save()
             logger.info("玩家数据已强制保存到数据库")
         except Exception as e:
             logger.error(f"强制保存玩家数据失败: {e}")
@@ -1562,29 +1610,27 @@ class TexasHoldemPlugin(Star):
                 else:
                     remaining_players.append(player_id)
             
-            # 移除筹码不足的玩家
-            for player_id in players_to_remove:
-                room.player_ids.discard(player_id)
-                self.room_manager.player_room_mapping.pop(player_id, None)
+            # 重置游戏实例，准备新游戏（在座玩家的筹码转为待入座买入）
+            self.room_manager.release_game(room)
+            
+            # 如果房间内玩家不足，剩余玩家也一并移出
+            if len(remaining_players) < 2:
+                players_to_remove.extend(remaining_players)
             
-            # 更新房间状态
-            room.current_players = len(remaining_players)
+            # 移除玩家并返还其桌上筹码
+            for player_id in players_to_remove:
+                chips = room.pending_buy_ins.pop(player_id, 0)
+                if chips > 0:
+                    await self.player_manager.add_chips(player_id, chips, "游戏结束返还")
+                room.player_ids.pop(player_id, None)
+                self.room_manager.unmap_player(player_id)
             
             # 如果还有足够玩家，将房间设置为等待状态；否则设置为完成状态
             if room.current_players >= 2:
-                room.status = RoomStatus.WAITING
-                room.game = None  # 重置游戏实例，准备新游戏
+                self.room_manager.set_status(room, RoomStatus.WAITING)
                 logger.info(f"房间 {room.room_id} 已重置为等待状态，剩余玩家: {room.current_players}")
             else:
-                room.status = RoomStatus.FINISHED
-                room.game = None
-                
-                # 如果房间内玩家不足，清空剩余玩家
-                for player_id in remaining_players:
-                    room.player_ids.discard(player_id)
-                    self.room_manager.player_room_mapping.pop(player_id, None)
-                room.current_players = 0
-                
+                self.room_manager.set_status(room, RoomStatus.FINISHED)
                 logger.info(f"房间 {room.room_id} 玩家不足，设置为完成状态")
             
         except Exception as e:
@@ -1613,8 +1659,9 @@ class TexasHoldemPlugin(Star):
         保存所有数据，关闭数据库连接
         """
         try:
+            # 先关闭房间（等待离开任务并返还筹码），再保存玩家数据
+            await self.room_manager.cleanup()
             await self.player_manager.cleanup()
-            await self.room_manager.close_all_rooms()
             await self.database_manager.close()
             logger.info("德州扑克插件已安全卸载")
         except Exception as e:
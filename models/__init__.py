@@ -5,13 +5,13 @@
 """
 
 from .card_system import Card, CardSystem, HandRank, HandEvaluation
-from .game_engine import TexasHoldemGame, GamePhase, PlayerAction
+from .game_engine import TexasHoldemGame, GameConfig, GamePhase, PlayerAction
 from .player_manager import PlayerManager, PlayerInfo, PlayerStats
-from .room_manager import RoomManager, GameRoom, RoomStatus, RoomType
+from .room_manager import RoomManager, GameRoom, RoomStatus, RoomType, JoinStatus, JoinResult
 
 __all__ = [
     "Card", "CardSystem", "HandRank", "HandEvaluation",
-    "TexasHoldemGame", "GamePhase", "PlayerAction", 
+    "TexasHoldemGame", "GameConfig", "GamePhase", "PlayerAction", 
     "PlayerManager", "PlayerInfo", "PlayerStats",
-    "RoomManager", "GameRoom", "RoomStatus", "RoomType"
+    "RoomManager", "GameRoom", "RoomStatus", "RoomType", "JoinStatus", "JoinResult"
 ]
@@ -1,6 +1,7 @@
 from enum import Enum
 from typing import List, Tuple, Dict, Optional
 from dataclasses import dataclass, field
+from functools import cached_property
 import random
 from collections import Counter
 
@@ -74,6 +75,7 @@ class Card:
     - rank: 点数
     
     方法：
+    - rendered: 牌的字符串表示（首次访问时计算并缓存）
     - __str__: 返回牌的字符串表示
     - __eq__: 比较两张牌是否相等
     - __lt__: 比较牌的大小（按点数）
@@ -81,6 +83,16 @@ class Card:
     suit: Suit
     rank: Rank
     
+    @cached_property
+    def rendered(self) -> str:
+        """
+        扑克牌的字符串表示（首次访问时计算并缓存）
+        
+        Returns:
+            str: 如"♠A", "♥K"等格式
+        """
+        return f"{self.suit.value}{self.rank.display}"
+    
     def __str__(self) -> str:
         """
         返回扑克牌的字符串表示
@@ -88,7 +100,7 @@ class Card:
         Returns:
             str: 如"♠A", "♥K"等格式
         """
-        return f"{self.suit.value}{self.rank.display}"
+        return self.rendered
     
     def __eq__(self, other) -> bool:
         """
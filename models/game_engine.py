@@ -37,6 +37,11 @@ class PlayerStatus(Enum):
     WAITING = "waiting"          # 等待状态
 
 
+# 玩家状态判定集合（避免每次判定时构建列表）
+_CAN_ACT_STATUSES = frozenset((PlayerStatus.ACTIVE, PlayerStatus.WAITING))
+_IN_HAND_STATUSES = frozenset((PlayerStatus.ACTIVE, PlayerStatus.ALL_IN))
+
+
 @dataclass
 class GamePlayer:
     """
@@ -93,7 +98,7 @@ class GamePlayer:
         Returns:
             bool: 是否可以行动
         """
-        return self.status in [PlayerStatus.ACTIVE, PlayerStatus.WAITING] and self.chips > 0
+        return self.status in _CAN_ACT_STATUSES and self.chips > 0
     
     def is_in_hand(self) -> bool:
         """
@@ -102,7 +107,7 @@ class GamePlayer:
         Returns:
             bool: 是否在牌局中
         """
-        return self.status in [PlayerStatus.ACTIVE, PlayerStatus.ALL_IN]
+        return self.status in _IN_HAND_STATUSES
 
 
 @dataclass
@@ -118,6 +123,21 @@ class SidePot:
     eligible_players: List[str]
 
 
+@dataclass(frozen=True, slots=True)
+class GameConfig:
+    """
+    牌局配置（房间创建时确定，之后不再变化）
+    
+    属性：
+    - small_blind: 小盲注金额
+    - big_blind: 大盲注金额
+    - max_players: 最大玩家数
+    """
+    small_blind: int
+    big_blind: int
+    max_players: int = 6
+
+
 class TexasHoldemGame:
     """
     德州扑克游戏引擎
@@ -130,20 +150,19 @@ class TexasHoldemGame:
     - 超时处理和断线重连
     """
     
-    def __init__(self, room_id: str, small_blind: int, big_blind: int, max_players: int = 6):
+    def __init__(self, room_id: str, config: GameConfig):
         """
         初始化德州扑克游戏
         
         Args:
             room_id: 房间ID
-            small_blind: 小盲注金额
-            big_blind: 大盲注金额
-            max_players: 最大玩家数
+            config: 牌局配置（盲注和最大玩家数）
         """
         self.room_id = room_id
-        self.small_blind = small_blind
-        self.big_blind = big_blind
-        self.max_players = max_players
+        self.config = config
+        self.small_blind = config.small_blind
+        self.big_blind = config.big_blind
+        self.max_players = config.max_players
         
         # 游戏状态
         self.game_phase = GamePhase.WAITING
@@ -1073,6 +1092,15 @@ class TexasHoldemGame:
         """
         return [str(card) for card in self.community_cards]
     
+    def format_community_cards(self) -> str:
+        """
+        获取公共牌的展示字符串（未发公共牌时为空字符串）
+        
+        Returns:
+            str: 以空格分隔的公共牌
+        """
+        return " ".join([card.rendered for card in self.community_cards])
+    
     def get_player_chips(self, player_id: str) -> Optional[int]:
         """
         获取玩家筹码数量
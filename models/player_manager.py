@@ -1,12 +1,15 @@
 from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, field
 import asyncio
+import bisect
+import heapq
 import time
 import json
+from operator import attrgetter
 from pathlib import Path
 
 from astrbot.api import logger
-from .card_system import HandEvaluation
+from .card_system import HandEvaluation, HandRank
 
 
 @dataclass
@@ -203,6 +206,19 @@ class PlayerStats:
     favorite_hand: Optional[str] = None  # 最常获胜的牌型
 
 
+# 牌型中文名称 -> 牌型等级值（best_hand 以中文名称保存）
+_HAND_RANK_VALUES = {rank.name_cn: rank.rank_value for rank in HandRank}
+
+# 排行榜各类别的排序键（未知类别按筹码排序）
+_LEADERBOARD_KEYS = {
+    "chips": attrgetter('chips'),
+    "wins": attrgetter('wins'),
+    "profit": attrgetter('total_profit'),
+    "winrate": attrgetter('win_rate'),
+    "level": attrgetter('level', 'experience'),
+}
+
+
 class PlayerManager:
     """
     玩家管理系统
@@ -226,12 +242,30 @@ class PlayerManager:
         self.database_manager = database_manager
         self.players: Dict[str, PlayerInfo] = {}
         self.achievements_config = self._init_achievements()
+        # 成就展示标签（"图标 名称"），配置加载后计算一次
+        self.achievement_labels: Dict[str, str] = {
+            aid: f"{cfg['icon']} {cfg['name']}" for aid, cfg in self.achievements_config.items()
+        }
+        
+        # 封禁索引：只保存被封禁的玩家，避免全量扫描
+        self.banned_index: Dict[str, PlayerInfo] = {}
+        # 按封禁到期时间排序的 (排序键, 玩家ID) 列表，写入时维护顺序，分页时直接切片
+        self._banned_order: List[Tuple[float, str]] = []
+        self._banned_keys: Dict[str, Tuple[float, str]] = {}
+        # 限时封禁到期堆：(ban_until, player_id)，过期项在弹出时惰性校验
+        self.banned_expiry_heap: List[Tuple[float, str]] = []
+        # 全量玩家数据是否已成功加载（加载前封禁索引不完整）
+        self.players_loaded = False
         
         # 缓存管理
         self.cache_dirty = False
         self.last_save_time = time.time()
         self.auto_save_interval = 300  # 5分钟自动保存
         
+        # 合并保存：同一时间只运行一次全量保存，期间的请求合并为一次补存
+        self._save_task: Optional[asyncio.Task] = None
+        self._save_pending = False
+        
         # 自动保存任务
         self.auto_save_task: Optional[asyncio.Task] = None
         
@@ -508,6 +542,7 @@ class PlayerManager:
         if player_data:
             player = PlayerInfo.from_dict(player_data)
             self.players[player_id] = player
+            self._index_ban(player)
             player.last_active = time.time()
             return player
         
@@ -615,8 +650,7 @@ class PlayerManager:
                 stats.hand_type_wins[hand_name] = stats.hand_type_wins.get(hand_name, 0) + 1
                 
                 # 更新最佳牌型
-                if not player.best_hand or hand_evaluation.hand_rank.rank_value > self._get_hand_rank_value(player.best_hand):
-                    player.best_hand = hand_name
+                self.update_best_hand(player, hand_evaluation)
             
             # 检查成就
             await self._check_achievements(stats)
@@ -714,6 +748,7 @@ class PlayerManager:
         else:
             player.ban_until = 0  # 永久封禁
         
+        self._index_ban(player)
         self.cache_dirty = True
         
         logger.info(f"玩家 {player_id} 被封禁: {reason}, 时长: {'永久' if duration_hours == 0 else f'{duration_hours}小时'}")
@@ -737,6 +772,7 @@ class PlayerManager:
         player.ban_status = False
         player.ban_reason = ""
         player.ban_until = 0
+        self._unindex_ban(player_id)
         
         self.cache_dirty = True
         
@@ -744,6 +780,95 @@ class PlayerManager:
         
         return True
     
+    def _index_ban(self, player: PlayerInfo):
+        """
+        将封禁中的玩家写入封禁索引和到期堆
+        
+        Args:
+            player: 玩家信息对象
+        """
+        if not player.ban_status:
+            return
+        player_id = player.player_id
+        # 重复封禁时先移除旧的排序位置
+        self._unindex_ban(player_id)
+        
+        # 永久封禁排在限时封禁之后
+        sort_key = (player.ban_until if player.ban_until > 0 else float('inf'), player_id)
+        self.banned_index[player_id] = player
+        self._banned_keys[player_id] = sort_key
+        bisect.insort(self._banned_order, sort_key)
+        if player.ban_until > 0:
+            heapq.heappush(self.banned_expiry_heap, (player.ban_until, player.player_id))
+    
+    def pop_expired_bans(self, now: float) -> List[PlayerInfo]:
+        """
+        解除所有已到期的限时封禁
+        
+        Args:
+            now: 当前时间戳
+            
+        Returns:
+            List[PlayerInfo]: 本次被自动解封的玩家
+        """
+        heap = self.banned_expiry_heap
+        unbanned_players = []
+        
+        while heap and heap[0][0] <= now:
+            ban_until, player_id = heapq.heappop(heap)
+            player = self.banned_index.get(player_id)
+            # 已解封、被重新封禁或改为永久封禁的旧条目直接丢弃
+            if player is None or player.ban_until != ban_until:
+                continue
+            
+            player.ban_status = False
+            player.ban_reason = ""
+            player.ban_until = 0
+            self._unindex_ban(player_id)
+            self.cache_dirty = True
+            
+            unbanned_players.append(player)
+            logger.info(f"自动解封玩家: {player_id} ({player.display_name})")
+        
+        return unbanned_players
+    
+    def _unindex_ban(self, player_id: str):
+        """
+        从封禁索引和排序列表中移除玩家（到期堆中的旧条目惰性丢弃）
+        
+        Args:
+            player_id: 玩家ID
+        """
+        self.banned_index.pop(player_id, None)
+        sort_key = self._banned_keys.pop(player_id, None)
+        if sort_key is not None:
+            idx = bisect.bisect_left(self._banned_order, sort_key)
+            if idx < len(self._banned_order) and self._banned_order[idx] == sort_key:
+                del self._banned_order[idx]
+    
+    def get_banned_count(self) -> int:
+        """
+        获取被封禁玩家数量
+        
+        Returns:
+            int: 被封禁玩家数量
+        """
+        return len(self.banned_index)
+    
+    def get_banned_players(self, start: int = 0, end: Optional[int] = None) -> List[PlayerInfo]:
+        """
+        获取被封禁的玩家（按封禁到期时间排序，永久封禁在后）
+        
+        Args:
+            start: 起始下标
+            end: 结束下标（不含），None表示到末尾
+            
+        Returns:
+            List[PlayerInfo]: 被封禁玩家列表
+        """
+        banned_index = self.banned_index
+        return [banned_index[player_id] for _, player_id in self._banned_order[start:end]]
+    
     async def equip_achievement(self, player_id: str, achievement_id: str) -> Tuple[bool, str]:
         """
         装备成就
@@ -783,7 +908,8 @@ class PlayerManager:
             player_id: 玩家ID
             
         Returns:
-            Dict: 成就进度信息
+            Dict: 成就进度信息，包含 all（已解锁在前的有序列表，is_unlocked 已按进度修正）、
+                  unlocked_count（已解锁数量）、total（成就总数）
         """
         if player_id not in self.players:
             return {}
@@ -792,10 +918,8 @@ class PlayerManager:
         if not stats:
             return {}
         
-        progress_data = {
-            'unlocked': [],
-            'locked': []
-        }
+        unlocked = []
+        locked = []
         
         # 先检查并解锁所有满足条件的成就
         await self._check_achievements(stats)
@@ -815,6 +939,10 @@ class PlayerManager:
                 # 发放奖励
                 await self.add_chips(stats.player_info.player_id, config["reward"], f"成就奖励: {config['name']}")
             
+            # 进度已达100%的成就按已解锁展示
+            progress_percent = min(100, (current_progress / target) * 100)
+            is_unlocked = is_unlocked or progress_percent >= 100
+            
             achievement_info = {
                 'id': achievement_id,
                 'name': config["name"],
@@ -824,20 +952,24 @@ class PlayerManager:
                 'reward': config["reward"],
                 'current_progress': current_progress,
                 'target': target,
-                'progress_percent': min(100, (current_progress / target) * 100),
+                'progress_percent': progress_percent,
                 'is_unlocked': is_unlocked
             }
             
             if is_unlocked:
-                progress_data['unlocked'].append(achievement_info)
+                unlocked.append(achievement_info)
             else:
-                progress_data['locked'].append(achievement_info)
+                locked.append(achievement_info)
         
         # 按类别排序
-        progress_data['unlocked'].sort(key=lambda x: (x['category'], x['name']))
-        progress_data['locked'].sort(key=lambda x: (x['category'], -x['progress_percent'], x['name']))
+        unlocked.sort(key=lambda x: (x['category'], x['name']))
+        locked.sort(key=lambda x: (x['category'], -x['progress_percent'], x['name']))
         
-        return progress_data
+        return {
+            'all': unlocked + locked,
+            'unlocked_count': len(unlocked),
+            'total': len(unlocked) + len(locked)
+        }
     
     async def get_player_stats(self, player_id: str) -> Optional[PlayerStats]:
         """
@@ -870,40 +1002,40 @@ class PlayerManager:
             favorite_hand=stats_data.get('favorite_hand')
         )
     
-    async def get_leaderboard(self, category: str = "chips", limit: int = 10) -> List[Tuple[int, PlayerInfo]]:
+    def _leaderboard_candidates(self):
         """
-        获取排行榜
+        遍历可上榜的玩家（过滤掉封禁的玩家和游戏数太少的玩家）
+        
+        Returns:
+            Iterator[PlayerInfo]: 可上榜玩家
+        """
+        return (p for p in self.players.values() if not p.is_banned and p.total_games >= 5)
+    
+    async def get_leaderboard_count(self) -> int:
+        """
+        获取可上榜玩家数量（用于排行榜分页）
+        
+        Returns:
+            int: 可上榜玩家数量
+        """
+        return sum(1 for _ in self._leaderboard_candidates())
+    
+    async def get_leaderboard(self, category: str = "chips", limit: int = 10, offset: int = 0) -> List[Tuple[int, PlayerInfo]]:
+        """
+        获取排行榜（只选出前 offset+limit 名，无需整体排序）
         
         Args:
-            category: 排行类别 (chips/wins/profit/winrate)
+            category: 排行类别 (chips/wins/profit/winrate/level)
             limit: 返回数量限制
+            offset: 起始偏移（用于分页）
             
         Returns:
             List[Tuple[int, PlayerInfo]]: 排行榜列表 (排名, 玩家信息)
         """
-        players = list(self.players.values())
-        
-        # 过滤掉封禁的玩家和游戏数太少的玩家
-        active_players = [p for p in players if not p.is_banned and p.total_games >= 5]
-        
-        # 根据类别排序
-        if category == "chips":
-            active_players.sort(key=lambda p: p.chips, reverse=True)
-        elif category == "wins":
-            active_players.sort(key=lambda p: p.wins, reverse=True)
-        elif category == "profit":
-            active_players.sort(key=lambda p: p.total_profit, reverse=True)
-        elif category == "winrate":
-            active_players.sort(key=lambda p: p.win_rate, reverse=True)
-        elif category == "level":
-            active_players.sort(key=lambda p: (p.level, p.experience), reverse=True)
-        else:
-            active_players.sort(key=lambda p: p.chips, reverse=True)
-        
-        # 返回前N名
-        result = [(i + 1, player) for i, player in enumerate(active_players[:limit])]
+        key = _LEADERBOARD_KEYS.get(category, _LEADERBOARD_KEYS["chips"])
+        top_players = heapq.nlargest(offset + limit, self._leaderboard_candidates(), key=key)
         
-        return result
+        return list(enumerate(top_players[offset:], start=offset + 1))
     
     async def get_all_players(self) -> List[PlayerInfo]:
         """
@@ -940,6 +1072,7 @@ class PlayerManager:
         )
         
         self.players[player_id] = reset_player
+        self._unindex_ban(player_id)
         self.cache_dirty = True
         
         # 清理数据库中的详细统计
@@ -982,11 +1115,24 @@ class PlayerManager:
         Returns:
             int: 牌型价值
         """
-        hand_values = {
-            "高牌": 1, "一对": 2, "两对": 3, "三条": 4, "顺子": 5,
-            "同花": 6, "葫芦": 7, "四条": 8, "同花顺": 9, "皇家同花顺": 10
-        }
-        return hand_values.get(hand_name, 0)
+        return _HAND_RANK_VALUES.get(hand_name, 0)
+    
+    def update_best_hand(self, player: PlayerInfo, hand_evaluation: HandEvaluation) -> bool:
+        """
+        按牌型等级值更新玩家历史最佳牌型
+        
+        Args:
+            player: 玩家对象
+            hand_evaluation: 本局手牌评估结果
+            
+        Returns:
+            bool: 是否刷新了最佳牌型
+        """
+        hand_rank = hand_evaluation.hand_rank
+        if player.best_hand and hand_rank.rank_value <= self._get_hand_rank_value(player.best_hand):
+            return False
+        player.best_hand = hand_rank.name_cn
+        return True
     
     async def _check_achievements(self, stats: PlayerStats):
         """
@@ -1009,6 +1155,27 @@ class PlayerManager:
                 
                 logger.info(f"玩家 {stats.player_info.player_id} 解锁成就: {config['name']}")
     
+    async def save_many(self, players: List[PlayerInfo]) -> bool:
+        """
+        批量保存玩家数据（用于牌局结算后即时落盘，单个事务提交）
+        
+        Args:
+            players: 玩家对象列表
+            
+        Returns:
+            bool: 是否保存成功
+        """
+        if not players:
+            return True
+        try:
+            success = await self.database_manager.batch_save_players([p.to_dict() for p in players])
+        except Exception as e:
+            logger.error(f"批量保存玩家数据失败: {e}")
+            return False
+        if not success:
+            logger.error(f"批量保存 {len(players)} 个玩家数据失败")
+        return success
+    
     async def _save_player_to_db(self, player: PlayerInfo):
         """
         保存单个玩家到数据库
@@ -1045,6 +1212,31 @@ class PlayerManager:
         except Exception as e:
             logger.error(f"保存玩家统计失败: {e}")
     
+    def schedule_save(self) -> asyncio.Task:
+        """
+        调度一次全量保存；已有保存在进行时只标记待补存，不再并发启动
+        
+        Returns:
+            asyncio.Task: 当前的保存任务（可 await 等待落盘）
+        """
+        if self._save_task and not self._save_task.done():
+            self._save_pending = True
+            return self._save_task
+        
+        self._save_pending = False
+        self._save_task = asyncio.create_task(self._run_scheduled_save())
+        return self._save_task
+    
+    async def _run_scheduled_save(self):
+        """
+        执行调度的保存，保存期间有新的请求则再补存一次
+        """
+        while True:
+            await self.save_all_players()
+            if not self._save_pending:
+                break
+            self._save_pending = False
+    
     async def save_all_players(self):
         """
         保存所有玩家数据到数据库（优化版本：使用批量操作）
@@ -1096,7 +1288,9 @@ class PlayerManager:
             for player_data in players_data:
                 player = PlayerInfo.from_dict(player_data)
                 self.players[player.player_id] = player
+                self._index_ban(player)
             
+            self.players_loaded = True
             logger.info(f"已加载 {len(self.players)} 个玩家数据")
         except Exception as e:
             logger.error(f"加载玩家数据失败: {e}")
@@ -1166,6 +1360,7 @@ class PlayerManager:
                     player = PlayerInfo.from_dict(player_data)
                     # 添加到缓存中
                     self.players[player.player_id] = player
+                    self._index_ban(player)
                     cached_players.append(player)
                     self.cache_dirty = True
             
@@ -1194,10 +1389,15 @@ class PlayerManager:
     async def auto_unban_task_loop(self):
         """
         自动解封检查任务循环
+        
+        按到期堆中最近的封禁到期时间休眠，最长不超过 auto_unban_interval（期间新增的封禁可能更早到期）
         """
         while True:
             try:
-                await asyncio.sleep(self.auto_unban_interval)
+                delay = self.auto_unban_interval
+                if self.banned_expiry_heap:
+                    delay = min(delay, max(0.0, self.banned_expiry_heap[0][0] - time.time()))
+                await asyncio.sleep(delay)
                 await self.check_and_unban_expired_players()
                     
             except asyncio.CancelledError:
@@ -1209,20 +1409,7 @@ class PlayerManager:
         """
         检查并解封到期的玩家
         """
-        current_time = time.time()
-        unbanned_players = []
-        
-        for player_id, player in self.players.items():
-            # 检查是否是被封禁且有到期时间的玩家
-            if player.ban_status and player.ban_until > 0 and current_time >= player.ban_until:
-                # 自动解封
-                player.ban_status = False
-                player.ban_reason = ""
-                player.ban_until = 0
-                self.cache_dirty = True
-                
-                unbanned_players.append(player)
-                logger.info(f"自动解封玩家: {player_id} ({player.display_name})")
+        unbanned_players = self.pop_expired_bans(time.time())
         
         if unbanned_players:
             # 这里可以添加通告功能，比如向管理员发送消息
@@ -1231,7 +1418,7 @@ class PlayerManager:
             logger.info(f"系统自动解封 {len(unbanned_players)} 名玩家: {', '.join(player_names)}")
             
             # 保存更新
-            await self.save_all_players()
+            self.schedule_save()
     
     async def cleanup(self):
         """
@@ -1241,4 +1428,6 @@ class PlayerManager:
             self.auto_save_task.cancel()
         if self.auto_unban_task and not self.auto_unban_task.done():
             self.auto_unban_task.cancel()
+        if self._save_task and not self._save_task.done():
+            await asyncio.gather(self._save_task, return_exceptions=True)
         await self.save_all_players()
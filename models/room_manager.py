@@ -1,13 +1,16 @@
-from typing import Dict, List, Optional, Any, Set
+from typing import Dict, List, Optional, Any, Set, Deque
 from dataclasses import dataclass, field
+from collections import defaultdict, deque
 import asyncio
 import time
 import uuid
 from enum import Enum
+from itertools import islice
+from operator import attrgetter
 
 from astrbot.api import logger
-from .game_engine import TexasHoldemGame, GamePhase
-from .player_manager import PlayerManager
+from .game_engine import TexasHoldemGame, GameConfig, GamePhase
+from .player_manager import PlayerManager, PlayerInfo
 
 
 class RoomStatus(Enum):
@@ -26,13 +29,59 @@ class RoomType(Enum):
     TOURNAMENT = "tournament"    # 锦标赛
 
 
-@dataclass
+class JoinStatus(Enum):
+    """加入房间结果枚举"""
+    JOINED = "joined"                      # 已入座
+    WAITLISTED = "waitlisted"              # 房间已满，进入等待列表
+    NOT_FOUND = "not_found"                # 房间不存在
+    ALREADY_IN_ROOM = "already_in_room"    # 已在其他房间
+    WRONG_PASSWORD = "wrong_password"      # 密码错误
+    BANNED = "banned"                      # 玩家被封禁
+    INSUFFICIENT_CHIPS = "insufficient_chips"  # 筹码不足
+    FINISHED = "finished"                  # 房间已结束
+    IN_PROGRESS = "in_progress"            # 游戏进行中无法入座
+
+
+@dataclass(slots=True)
+class JoinResult:
+    """
+    加入房间结果
+    
+    属性：
+    - status: 结果状态
+    - room: 房间对象（房间不存在时为None）
+    """
+    status: JoinStatus
+    room: Optional["GameRoom"] = None
+    
+    @property
+    def joined(self) -> bool:
+        """是否成功加入（入座或进入等待列表）"""
+        return self.status is JoinStatus.JOINED or self.status is JoinStatus.WAITLISTED
+    
+    def __bool__(self) -> bool:
+        return self.joined
+
+
+# 枚举值字符串缓存（序列化和统计时避免重复访问 .value）
+_STATUS_STR = {s: s.value for s in RoomStatus}
+_TYPE_STR = {t: t.value for t in RoomType}
+
+# 房间活跃判定窗口（秒）
+_ACTIVE_WINDOW = 1800  # 30分钟
+
+# 快速匹配排序键：按当前玩家数
+_room_player_count = attrgetter('current_players')
+
+
+@dataclass(slots=True)
 class GameRoom:
     """
     游戏房间数据类
     
     属性：
     - room_id: 房间唯一标识
+    - short_id: 房间短ID（room_id 前8位，创建时计算一次，用于消息展示）
     - room_name: 房间名称
     - room_type: 房间类型
     - creator_id: 创建者ID
@@ -43,15 +92,19 @@ class GameRoom:
     - min_buy_in: 最小买入金额
     - max_buy_in: 最大买入金额
     - max_players: 最大玩家数
-    - current_players: 当前玩家数
-    - player_ids: 玩家ID列表
-    - waiting_list: 等待列表
-    - game: 游戏实例
+    - current_players: 当前玩家数（由 player_ids 推导的只读属性）
+    - player_ids: 玩家ID（按入座顺序保存的有序映射）
+    - waiting_list: 等待列表（FIFO队列）
+    - waiting_set: 等待列表成员集合（用于O(1)成员检查）
+    - game: 游戏实例（首次开局时才创建）
+    - pending_buy_ins: 游戏实例创建前已入座玩家的买入金额
+    - game_config: 牌局配置（由盲注和最大玩家数生成）
     - created_time: 创建时间
-    - last_activity: 最后活跃时间
+    - last_activity: 最后活跃时间（单调时钟，仅用于计算空闲时长）
     - auto_start: 是否自动开始
     - allow_observers: 是否允许旁观
     - observers: 旁观者列表
+    - is_private: 是否为私人房间（创建时由 password/room_type 推导，之后不可修改，RoomManager 的房间索引依赖该值）
     """
     room_id: str
     room_name: str = ""
@@ -64,30 +117,38 @@ class GameRoom:
     min_buy_in: int = 100
     max_buy_in: int = 10000
     max_players: int = 6
-    current_players: int = 0
-    player_ids: Set[str] = field(default_factory=set)
-    waiting_list: List[str] = field(default_factory=list)
+    player_ids: Dict[str, None] = field(default_factory=dict)
+    waiting_list: Deque[str] = field(default_factory=deque)
+    waiting_set: Set[str] = field(default_factory=set)
     game: Optional[TexasHoldemGame] = None
+    pending_buy_ins: Dict[str, int] = field(default_factory=dict)
+    game_config: Optional[GameConfig] = None
     created_time: float = field(default_factory=time.time)
-    last_activity: float = field(default_factory=time.time)
+    last_activity: float = field(default_factory=time.monotonic)
     auto_start: bool = True
     allow_observers: bool = True
     observers: Set[str] = field(default_factory=set)
+    is_private: bool = field(init=False, default=False)
+    short_id: str = field(init=False, default="", repr=False)
     
     def __post_init__(self):
         """初始化后处理"""
+        self.short_id = self.room_id[:8]
         if not self.room_name:
-            self.room_name = f"房间_{self.room_id[:8]}"
+            self.room_name = f"房间_{self.short_id}"
+        if self.game_config is None:
+            self.game_config = GameConfig(self.small_blind, self.big_blind, self.max_players)
+        self.is_private = bool(self.password) or self.room_type == RoomType.PRIVATE
     
     @property
-    def is_private(self) -> bool:
+    def current_players(self) -> int:
         """
-        检查是否为私人房间
+        当前玩家数
         
         Returns:
-            bool: 是否为私人房间
+            int: 房间内已入座玩家数量
         """
-        return bool(self.password) or self.room_type == RoomType.PRIVATE
+        return len(self.player_ids)
     
     @property
     def is_full(self) -> bool:
@@ -119,41 +180,123 @@ class GameRoom:
         Returns:
             bool: 是否活跃（30分钟内有活动）
         """
-        return time.time() - self.last_activity < 1800  # 30分钟
+        return self.is_active_at(time.monotonic())
+    
+    def is_active_at(self, now: float) -> bool:
+        """
+        按给定时间点检查房间是否活跃，批量判断时可复用同一个 now
+        
+        Args:
+            now: time.monotonic() 时间点
+            
+        Returns:
+            bool: 是否活跃
+        """
+        return now - self.last_activity < _ACTIVE_WINDOW
     
     def update_activity(self):
         """更新最后活跃时间"""
-        self.last_activity = time.time()
+        self.last_activity = time.monotonic()
     
-    def to_dict(self) -> Dict[str, Any]:
+    def enqueue_waiting(self, player_id: str) -> bool:
         """
-        转换为字典格式
+        将玩家加入等待队列
         
+        Args:
+            player_id: 玩家ID
+            
         Returns:
-            Dict: 房间信息字典
+            bool: 是否新加入（已在队列中返回False）
         """
-        return {
-            'room_id': self.room_id,
-            'room_name': self.room_name,
-            'room_type': self.room_type.value,
-            'creator_id': self.creator_id,
-            'password': self.password,
-            'status': self.status.value,
-            'small_blind': self.small_blind,
-            'big_blind': self.big_blind,
-            'min_buy_in': self.min_buy_in,
-            'max_buy_in': self.max_buy_in,
-            'max_players': self.max_players,
-            'current_players': self.current_players,
-            'player_ids': list(self.player_ids),
-            'waiting_list': self.waiting_list,
-            'created_time': self.created_time,
-            'last_activity': self.last_activity,
-            'auto_start': self.auto_start,
-            'allow_observers': self.allow_observers,
-            'observers': list(self.observers),
-            'is_private': self.is_private
-        }
+        if player_id in self.waiting_set:
+            return False
+        self.waiting_list.append(player_id)
+        self.waiting_set.add(player_id)
+        return True
+    
+    def pop_waiting(self) -> str:
+        """
+        取出队首等待玩家
+        
+        Returns:
+            str: 玩家ID
+        """
+        player_id = self.waiting_list.popleft()
+        self.waiting_set.discard(player_id)
+        return player_id
+    
+    def remove_waiting(self, player_id: str) -> bool:
+        """
+        从等待队列中移除玩家
+        
+        Args:
+            player_id: 玩家ID
+            
+        Returns:
+            bool: 玩家是否在队列中
+        """
+        if player_id not in self.waiting_set:
+            return False
+        self.waiting_set.discard(player_id)
+        self.waiting_list.remove(player_id)
+        return True
+    
+    def clear_waiting(self):
+        """清空等待队列"""
+        self.waiting_list.clear()
+        self.waiting_set.clear()
+    
+    # to_dict 由模块级 _build_room_to_dict 在导入时生成并挂载
+
+
+# to_dict 的字段与取值表达式，顺序即输出字典的键顺序
+_ROOM_DICT_FIELDS = (
+    ('room_id', 'self.room_id'),
+    ('room_name', 'self.room_name'),
+    ('room_type', '_TYPE_STR[self.room_type]'),
+    ('creator_id', 'self.creator_id'),
+    ('password', 'self.password'),
+    ('status', '_STATUS_STR[self.status]'),
+    ('small_blind', 'self.small_blind'),
+    ('big_blind', 'self.big_blind'),
+    ('min_buy_in', 'self.min_buy_in'),
+    ('max_buy_in', 'self.max_buy_in'),
+    ('max_players', 'self.max_players'),
+    ('current_players', 'self.current_players'),
+    ('player_ids', 'list(self.player_ids)'),
+    ('waiting_list', 'list(self.waiting_list)'),
+    ('created_time', 'self.created_time'),
+    # last_activity 为单调时钟读数，输出时换算为时间戳
+    ('last_activity', 'time.time() - (time.monotonic() - self.last_activity)'),
+    ('auto_start', 'self.auto_start'),
+    ('allow_observers', 'self.allow_observers'),
+    ('observers', 'list(self.observers)'),
+    ('is_private', 'self.is_private'),
+)
+
+
+def _build_room_to_dict():
+    """
+    生成 GameRoom.to_dict 的实现
+    
+    参照 dataclasses 的 _create_fn 做法，在导入时把整个字典字面量编译成一个函数，
+    序列化时只需一次构建，无需逐字段执行赋值语句
+    
+    Returns:
+        Callable: 以房间对象为参数的 to_dict 函数
+    """
+    items = ", ".join(f"{key!r}: {expr}" for key, expr in _ROOM_DICT_FIELDS)
+    src = f"def to_dict(self):\n    return {{{items}}}\n"
+    namespace: Dict[str, Any] = {}
+    exec(src, {'_TYPE_STR': _TYPE_STR, '_STATUS_STR': _STATUS_STR, 'time': time}, namespace)
+    fn = namespace['to_dict']
+    fn.__qualname__ = f"{GameRoom.__qualname__}.to_dict"
+    fn.__doc__ = "转换为字典格式\n\nReturns:\n    Dict: 房间信息字典"
+    fn.__annotations__ = {'return': Dict[str, Any]}
+    return fn
+
+
+GameRoom.to_dict = _build_room_to_dict()
 
 
 class RoomManager:
@@ -182,22 +325,160 @@ class RoomManager:
         self.player_manager = player_manager
         self.rooms: Dict[str, GameRoom] = {}
         self.player_room_mapping: Dict[str, str] = {}  # 玩家ID -> 房间ID
+        # 反向索引：房间ID -> 玩家ID集合，与 player_room_mapping 同步维护
+        self.room_player_mapping: Dict[str, Set[str]] = defaultdict(set)
         self.next_room_number = 1  # 简单递增的房间号
         
+        # 二级索引：按状态/类型分桶的房间ID，避免全表扫描
+        self.rooms_by_status: Dict[RoomStatus, Set[str]] = defaultdict(set)
+        self.rooms_by_type: Dict[RoomType, Set[str]] = defaultdict(set)
+        # 公开房间索引（按创建顺序），房间列表查询直接读取前若干个
+        # 房间私密性在创建时确定，索引只在 _add_room/_remove_room（及延迟删除登记）时维护
+        self.public_rooms: Dict[str, GameRoom] = {}
+        
         # 配置参数
         self.max_rooms = 50
         self.room_cleanup_interval = 300  # 5分钟清理一次
         self.inactive_room_timeout = 3600  # 1小时无活动自动关闭
+        self.room_deletion_delay = 30  # 已结束房间延迟删除时间
+        self.shutdown_drain_timeout = 10  # 关闭时等待后台任务完成的最长时间
+        
+        # 待删除房间：房间ID -> 删除截止时间（time.monotonic）
+        self._pending_deletions: Dict[str, float] = {}
         
         # 异步任务
         self.cleanup_task: Optional[asyncio.Task] = None
-        self.start_cleanup_task()
+        self._cleanup_started = False  # 清理任务延迟到首次异步调用时启动
+        self._background_tasks: Set[asyncio.Task] = set()  # 持有后台任务引用，防止被提前回收
     
     def start_cleanup_task(self):
         """启动房间清理任务"""
         if self.cleanup_task is None or self.cleanup_task.done():
             self.cleanup_task = asyncio.create_task(self._room_cleanup_loop())
     
+    def _ensure_cleanup_task(self):
+        """在事件循环中首次调用时启动清理任务（只启动一次）"""
+        if self._cleanup_started:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._cleanup_started = True
+        self.start_cleanup_task()
+    
+    def _add_room(self, room: GameRoom):
+        """
+        注册房间并写入索引
+        
+        Args:
+            room: 房间对象
+        """
+        self.rooms[room.room_id] = room
+        self.rooms_by_status[room.status].add(room.room_id)
+        self.rooms_by_type[room.room_type].add(room.room_id)
+        if not room.is_private:
+            self.public_rooms[room.room_id] = room
+    
+    def _remove_room(self, room_id: str) -> Optional[GameRoom]:
+        """
+        移除房间并同步清理索引
+        
+        Args:
+            room_id: 房间ID
+            
+        Returns:
+            Optional[GameRoom]: 被移除的房间，不存在返回None
+        """
+        room = self.rooms.pop(room_id, None)
+        if room:
+            self.rooms_by_status[room.status].discard(room_id)
+            self.rooms_by_type[room.room_type].discard(room_id)
+            self.public_rooms.pop(room_id, None)
+        return room
+    
+    def destroy_room(self, room_id: str) -> Optional[GameRoom]:
+        """
+        立即销毁房间：移除房间及其索引、取消延迟删除，并清理所有指向该房间的玩家映射
+        
+        Args:
+            room_id: 房间ID
+            
+        Returns:
+            Optional[GameRoom]: 被销毁的房间，不存在返回None
+        """
+        self._pending_deletions.pop(room_id, None)
+        room = self._remove_room(room_id)
+        for player_id in self.unmap_room(room_id):
+            logger.info(f"清理玩家 {player_id} 的房间映射")
+        return room
+    
+    def _map_player(self, player_id: str, room_id: str):
+        """
+        记录玩家所在房间并维护反向索引
+        
+        Args:
+            player_id: 玩家ID
+            room_id: 房间ID
+        """
+        self.unmap_player(player_id)
+        self.player_room_mapping[player_id] = room_id
+        self.room_player_mapping[room_id].add(player_id)
+    
+    def unmap_player(self, player_id: str) -> Optional[str]:
+        """
+        移除玩家的房间映射并同步清理反向索引
+        
+        Args:
+            player_id: 玩家ID
+            
+        Returns:
+            Optional[str]: 原映射的房间ID，不存在返回None
+        """
+        room_id = self.player_room_mapping.pop(player_id, None)
+        if room_id is not None:
+            members = self.room_player_mapping.get(room_id)
+            if members is not None:
+                members.discard(player_id)
+                if not members:
+                    del self.room_player_mapping[room_id]
+        return room_id
+    
+    def unmap_room(self, room_id: str) -> Set[str]:
+        """
+        移除所有指向该房间的玩家映射（借助反向索引，无需扫描全表）
+        
+        Args:
+            room_id: 房间ID
+            
+        Returns:
+            Set[str]: 被移除映射的玩家ID集合
+        """
+        player_ids = self.room_player_mapping.pop(room_id, set())
+        for player_id in player_ids:
+            self.player_room_mapping.pop(player_id, None)
+        return player_ids
+    
+    def set_status(self, room: GameRoom, status: RoomStatus):
+        """
+        更新房间状态并维护状态索引
+        
+        Args:
+            room: 房间对象
+            status: 新状态
+        """
+        if room.status is status:
+            return
+        if room.room_id in self.rooms:
+            self.rooms_by_status[room.status].discard(room.room_id)
+            self.rooms_by_status[status].add(room.room_id)
+            # 房间重新投入使用时撤销延迟删除，并恢复到公开房间列表
+            if (room.status is RoomStatus.FINISHED and
+                    self._pending_deletions.pop(room.room_id, None) is not None and
+                    not room.is_private):
+                self.public_rooms[room.room_id] = room
+        room.status = status
+    
     async def create_room(self, creator_id: str, room_name: str = "", 
                          room_type: RoomType = RoomType.QUICK_MATCH,
                          small_blind: int = 1, big_blind: int = 2,
@@ -219,6 +500,9 @@ class RoomManager:
         Returns:
             Optional[GameRoom]: 创建的房间对象，失败返回None
         """
+        self._ensure_cleanup_task()
+        self._flush_due_deletions()
+        
         # 检查房间数量限制
         if len(self.rooms) >= self.max_rooms:
             logger.warning(f"房间数量已达上限: {self.max_rooms}")
@@ -258,89 +542,89 @@ class RoomManager:
             allow_observers=kwargs.get('allow_observers', True)
         )
         
-        self.rooms[room_id] = room
+        self._add_room(room)
         
         # 创建者自动加入房间
-        await self.join_room(room_id, creator_id)
+        await self.join_room(room_id, creator_id, _player=player)
         
         logger.info(f"创建房间: {room_id} by {creator_id}, 盲注: {small_blind}/{big_blind}")
         
         return room
     
-    async def join_room(self, room_id: str, player_id: str, password: str = "") -> bool:
+    async def join_room(self, room_id: str, player_id: str, password: str = "",
+                        _player: Optional[PlayerInfo] = None) -> JoinResult:
         """
-        玩家加入房间
+        玩家加入房间（存在性、容量和状态检查都在此完成，调用方无需先查询房间）
         
         Args:
             room_id: 房间ID
             player_id: 玩家ID
             password: 房间密码（私人房间需要）
+            _player: 调用方已获取的玩家对象（内部使用，避免重复查询）
             
         Returns:
-            bool: 是否成功加入
+            JoinResult: 加入结果（可直接作为布尔值判断是否成功）
         """
+        self._ensure_cleanup_task()
+        
         room = self.rooms.get(room_id)
         if not room:
             logger.warning(f"房间不存在: {room_id}")
-            return False
+            return JoinResult(JoinStatus.NOT_FOUND)
         
         # 检查玩家是否已在其他房间
         if player_id in self.player_room_mapping:
             current_room_id = self.player_room_mapping[player_id]
             if current_room_id != room_id:
                 logger.warning(f"玩家 {player_id} 已在房间 {current_room_id} 中")
-                return False
+                return JoinResult(JoinStatus.ALREADY_IN_ROOM, room)
         
         # 检查密码
         if room.is_private and room.password != password:
             logger.warning(f"房间 {room_id} 密码错误")
-            return False
+            return JoinResult(JoinStatus.WRONG_PASSWORD, room)
         
         # 检查封禁状态
-        player = await self.player_manager.get_or_create_player(player_id)
+        player = _player or await self.player_manager.get_or_create_player(player_id)
         if player.is_banned:
             logger.warning(f"玩家 {player_id} 被封禁，无法加入房间")
-            return False
+            return JoinResult(JoinStatus.BANNED, room)
         
         # 检查筹码
         required_chips = room.min_buy_in
         if player.chips < required_chips:
             logger.warning(f"玩家 {player_id} 筹码不足，需要 {required_chips}，当前 {player.chips}")
-            return False
+            return JoinResult(JoinStatus.INSUFFICIENT_CHIPS, room)
         
         # 检查房间状态
         if room.status == RoomStatus.FINISHED:
             logger.warning(f"房间 {room_id} 已结束")
-            return False
+            return JoinResult(JoinStatus.FINISHED, room)
         
         # 如果房间满了，加入等待列表
         if room.is_full:
-            if player_id not in room.waiting_list:
-                room.waiting_list.append(player_id)
+            if room.enqueue_waiting(player_id):
                 logger.info(f"玩家 {player_id} 加入房间 {room_id} 等待列表")
-            return True
+            return JoinResult(JoinStatus.WAITLISTED, room)
         
         # 加入房间
-        room.player_ids.add(player_id)
-        room.current_players = len(room.player_ids)
+        room.player_ids[player_id] = None
         room.update_activity()
         
-        self.player_room_mapping[player_id] = room_id
+        self._map_player(player_id, room_id)
         
-        # 创建游戏实例
-        if room.game is None:
-            room.game = TexasHoldemGame(
-                room_id=room_id,
-                small_blind=room.small_blind,
-                big_blind=room.big_blind,
-                max_players=room.max_players
-            )
-        
-        # 将玩家添加到游戏中
+        # 将玩家添加到游戏中（游戏未创建时先记录买入，开局时再入座）
         buy_in = min(player.chips, room.max_buy_in)
         buy_in = max(buy_in, room.min_buy_in)
         
-        if room.game.add_player(player_id, buy_in):
+        if room.game is None:
+            seated = player_id not in room.pending_buy_ins
+            if seated:
+                room.pending_buy_ins[player_id] = buy_in
+        else:
+            seated = room.game.add_player(player_id, buy_in)
+        
+        if seated:
             # 更新玩家筹码
             await self.player_manager.update_player_chips(player_id, player.chips - buy_in)
             
@@ -348,13 +632,12 @@ class RoomManager:
             
             # 不再自动开始游戏，需要手动开始
             
-            return True
+            return JoinResult(JoinStatus.JOINED, room)
         else:
             # 加入游戏失败，从房间移除
-            room.player_ids.discard(player_id)
-            room.current_players = len(room.player_ids)
-            self.player_room_mapping.pop(player_id, None)
-            return False
+            room.player_ids.pop(player_id, None)
+            self.unmap_player(player_id)
+            return JoinResult(JoinStatus.IN_PROGRESS, room)
     
     async def leave_room(self, room_id: str, player_id: str) -> bool:
         """
@@ -367,34 +650,58 @@ class RoomManager:
         Returns:
             bool: 是否成功离开
         """
+        self._ensure_cleanup_task()
+        
         room = self.rooms.get(room_id)
         if not room:
             return False
         
         # 从等待列表移除（快速操作）
-        if player_id in room.waiting_list:
-            room.waiting_list.remove(player_id)
-            self.player_room_mapping.pop(player_id, None)
+        if room.remove_waiting(player_id):
+            self.unmap_player(player_id)
             return True
         
         # 从房间移除（快速操作）
         if player_id in room.player_ids:
-            room.player_ids.discard(player_id)
-            room.current_players = len(room.player_ids)
+            room.player_ids.pop(player_id, None)
             room.update_activity()
             
             # 更新映射（快速操作）
-            self.player_room_mapping.pop(player_id, None)
+            self.unmap_player(player_id)
             
             logger.info(f"玩家 {player_id} 离开房间 {room_id}")
             
             # 异步处理复杂操作，不阻塞主流程
-            asyncio.create_task(self._handle_player_leave_async(room, player_id))
+            task = asyncio.create_task(self._handle_player_leave_async(room, player_id))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
             
             return True
         
         return False
     
+    async def leave_current_room(self, player_id: str) -> Optional[GameRoom]:
+        """
+        玩家离开当前所在房间（由管理器查找房间，调用方无需先查询）
+        
+        Args:
+            player_id: 玩家ID
+            
+        Returns:
+            Optional[GameRoom]: 成功离开的房间对象，不在任何房间时返回None
+        """
+        room_id = self.player_room_mapping.get(player_id)
+        if not room_id:
+            return None
+        
+        room = self.rooms.get(room_id)
+        if room and await self.leave_room(room_id, player_id):
+            return room
+        
+        # 映射已失效，顺带清理
+        self.unmap_player(player_id)
+        return None
+    
     async def _handle_player_leave_async(self, room: GameRoom, player_id: str):
         """
         异步处理玩家离开的复杂逻辑
@@ -405,21 +712,23 @@ class RoomManager:
         """
         try:
             # 从游戏中移除并返还筹码
+            player_chips = self._safe_chips(room, player_id)
+            if player_chips > 0:
+                # 异步返还筹码
+                await self.player_manager.add_chips(player_id, player_chips, "离开房间返还")
+            
+            # 从游戏中移除玩家
             if room.game:
-                player_chips = room.game.get_player_chips(player_id)
-                if player_chips > 0:
-                    # 异步返还筹码
-                    await self.player_manager.add_chips(player_id, player_chips, "离开房间返还")
-                
-                # 从游戏中移除玩家
                 room.game.remove_player(player_id)
+            else:
+                room.pending_buy_ins.pop(player_id, None)
             
             # 处理等待列表中的玩家
             await self._process_waiting_list(room)
             
             # 如果房间空了，标记为结束
             if room.current_players == 0:
-                room.status = RoomStatus.FINISHED
+                self.set_status(room, RoomStatus.FINISHED)
                 await self._cleanup_room(room.room_id)
                 
         except Exception as e:
@@ -499,19 +808,32 @@ class RoomManager:
         room = self.rooms.get(room_id)
         if not room:
             # 房间不存在，清理映射
-            self.player_room_mapping.pop(player_id, None)
+            self.unmap_player(player_id)
             logger.warning(f"清理无效房间映射: {player_id} -> {room_id}")
             return None
         
         # 双重验证：检查玩家是否真的在房间中
-        if player_id not in room.player_ids and player_id not in room.waiting_list:
+        if player_id not in room.player_ids and player_id not in room.waiting_set:
             # 映射不一致，清理并返回None  
-            self.player_room_mapping.pop(player_id, None)
+            self.unmap_player(player_id)
             logger.warning(f"清理不一致的玩家映射: {player_id} -> {room_id}")
             return None
             
         return room
     
+    def get_public_rooms(self, limit: int) -> List[GameRoom]:
+        """
+        获取公开房间（按创建顺序）
+        
+        Args:
+            limit: 最多返回的房间数
+            
+        Returns:
+            List[GameRoom]: 公开房间列表
+        """
+        self._flush_due_deletions()
+        return list(islice(self.public_rooms.values(), limit))
+    
     async def get_available_rooms(self) -> List[GameRoom]:
         """
         获取可用房间列表
@@ -520,11 +842,14 @@ class RoomManager:
             List[GameRoom]: 可用房间列表
         """
         available_rooms = []
+        candidate_ids = (self.rooms_by_status[RoomStatus.WAITING] |
+                         self.rooms_by_status[RoomStatus.IN_GAME])
         
-        for room in self.rooms.values():
-            if (room.status in [RoomStatus.WAITING, RoomStatus.IN_GAME] and
-                room.is_active and
-                not room.is_private):
+        now = time.monotonic()
+        
+        for room_id in candidate_ids:
+            room = self.rooms.get(room_id)
+            if room and now - room.last_activity < _ACTIVE_WINDOW and not room.is_private:
                 available_rooms.append(room)
         
         # 按创建时间排序
@@ -542,27 +867,36 @@ class RoomManager:
         Returns:
             Optional[GameRoom]: 匹配到的房间
         """
+        self._ensure_cleanup_task()
+        
         # 获取玩家信息
         player = await self.player_manager.get_or_create_player(player_id)
         
         # 寻找合适的房间
         suitable_rooms = []
+        candidate_ids = (self.rooms_by_type[RoomType.QUICK_MATCH] &
+                         self.rooms_by_status[RoomStatus.WAITING])
         
-        for room in self.rooms.values():
-            if (room.room_type == RoomType.QUICK_MATCH and
-                room.status == RoomStatus.WAITING and
+        for room_id in candidate_ids:
+            room = self.rooms.get(room_id)
+            if (room and
                 not room.is_full and
                 not room.is_private and
                 room.min_buy_in <= player.chips):
                 suitable_rooms.append(room)
         
-        # 按玩家数量排序，优先加入人多的房间
-        suitable_rooms.sort(key=lambda r: r.current_players, reverse=True)
-        
-        # 尝试加入最合适的房间
-        for room in suitable_rooms:
-            if await self.join_room(room.room_id, player_id):
-                return room
+        if suitable_rooms:
+            # 优先加入人最多的房间：通常一次就能成功，无需先完整排序
+            best_room = max(suitable_rooms, key=_room_player_count)
+            if await self.join_room(best_room.room_id, player_id, _player=player):
+                return best_room
+            
+            # 加入失败时再按玩家数量排序依次尝试其余房间
+            suitable_rooms.remove(best_room)
+            suitable_rooms.sort(key=_room_player_count, reverse=True)
+            for room in suitable_rooms:
+                if await self.join_room(room.room_id, player_id, _player=player):
+                    return room
         
         # 没有合适房间，创建新房间
         new_room = await self.create_room(
@@ -589,28 +923,27 @@ class RoomManager:
         if not room:
             return False
         
-        room.status = RoomStatus.WAITING
+        self.set_status(room, RoomStatus.WAITING)
         room.update_activity()
         
         # 批量检查和处理筹码不足的玩家
-        if room.game:
-            players_to_remove = []
-            chip_refunds = []
-            
-            # 收集需要移除的玩家和退款信息
-            for player_id in list(room.player_ids):
-                player_chips = room.game.get_player_chips(player_id)
-                if player_chips < room.min_buy_in:
-                    players_to_remove.append(player_id)
-                    if player_chips > 0:
-                        chip_refunds.append((player_id, player_chips))
-            
-            # 批量返还筹码
-            for player_id, chips in chip_refunds:
-                await self.player_manager.add_chips(player_id, chips, "游戏结束返还")
-            
-            # 批量移除玩家（避免 N 次 leave_room 调用）
-            await self._batch_remove_players(room, players_to_remove)
+        players_to_remove = []
+        chip_refunds = []
+        
+        # 收集需要移除的玩家和退款信息（游戏未创建时按待入座买入计算）
+        for player_id in list(room.player_ids):
+            player_chips = self._safe_chips(room, player_id)
+            if player_chips < room.min_buy_in:
+                players_to_remove.append(player_id)
+                if player_chips > 0:
+                    chip_refunds.append((player_id, player_chips))
+        
+        # 批量返还筹码
+        for player_id, chips in chip_refunds:
+            await self.player_manager.add_chips(player_id, chips, "游戏结束返还")
+        
+        # 批量移除玩家（避免 N 次 leave_room 调用）
+        await self._batch_remove_players(room, players_to_remove)
         
         # 处理等待列表
         await self._process_waiting_list(room)
@@ -622,13 +955,15 @@ class RoomManager:
         
         return True
     
-    async def close_room(self, room_id: str, reason: str = "房间关闭") -> bool:
+    async def close_room(self, room_id: str, reason: str = "房间关闭",
+                         immediate: bool = False) -> bool:
         """
         关闭房间
         
         Args:
             room_id: 房间ID
             reason: 关闭原因
+            immediate: 是否立即清理房间资源（跳过延迟删除）
             
         Returns:
             bool: 是否成功
@@ -637,32 +972,40 @@ class RoomManager:
         if not room:
             return False
         
-        # 结束游戏并返还筹码
-        if room.game:
-            for player_id in room.player_ids:
-                player_chips = room.game.get_player_chips(player_id)
-                if player_chips > 0:
-                    await self.player_manager.add_chips(player_id, player_chips, f"房间关闭返还: {reason}")
+        # 快照玩家列表，返还筹码和清除映射共用
+        player_ids = list(room.player_ids)
         
-        # 清除玩家映射
-        for player_id in room.player_ids:
-            self.player_room_mapping.pop(player_id, None)
+        # 结束游戏并并发返还筹码
+        refund_reason = f"房间关闭返还: {reason}"
+        refunds = [(player_id, self._safe_chips(room, player_id)) for player_id in player_ids]
+        await asyncio.gather(*(
+            self.player_manager.add_chips(player_id, chips, refund_reason)
+            for player_id, chips in refunds if chips > 0
+        ))
+        
+        # 已返还的玩家移出房间和游戏，避免仍在排队的离开任务重复返还
+        room.player_ids.clear()
+        for player_id in player_ids:
+            if room.game:
+                room.game.remove_player(player_id)
+            room.pending_buy_ins.pop(player_id, None)
+            self.unmap_player(player_id)
         
         # 移除房间
-        room.status = RoomStatus.FINISHED
+        self.set_status(room, RoomStatus.FINISHED)
         
         logger.info(f"房间 {room_id} 已关闭: {reason}")
         
-        await self._cleanup_room(room_id)
+        await self._cleanup_room(room_id, immediate=immediate)
         
         return True
     
     async def close_all_rooms(self):
         """关闭所有房间"""
-        room_ids = list(self.rooms.keys())
-        
-        for room_id in room_ids:
-            await self.close_room(room_id, "系统关闭")
+        await asyncio.gather(
+            *(self.close_room(room_id, "系统关闭", immediate=True) for room_id in list(self.rooms)),
+            return_exceptions=True
+        )
         
         logger.info("所有房间已关闭")
     
@@ -679,16 +1022,17 @@ class RoomManager:
         if not room.can_start_game:
             return False
         
-        room.status = RoomStatus.STARTING
+        self.set_status(room, RoomStatus.STARTING)
         room.update_activity()
         
         # 启动游戏
-        if room.game and room.game.start_new_hand():
-            room.status = RoomStatus.IN_GAME
+        game = await self.ensure_game(room)
+        if game.start_new_hand():
+            self.set_status(room, RoomStatus.IN_GAME)
             logger.info(f"房间 {room.room_id} 游戏开始，玩家数: {room.current_players}")
             return True
         else:
-            room.status = RoomStatus.WAITING
+            self.set_status(room, RoomStatus.WAITING)
             logger.warning(f"房间 {room.room_id} 游戏启动失败")
             return False
     
@@ -702,16 +1046,72 @@ class RoomManager:
         """
         for player_id in player_ids:
             # 直接从房间和映射中移除
-            room.player_ids.discard(player_id)
-            self.player_room_mapping.pop(player_id, None)
-        
-        # 更新房间玩家数
-        room.current_players = len(room.player_ids)
+            room.player_ids.pop(player_id, None)
+            room.pending_buy_ins.pop(player_id, None)
+            self.unmap_player(player_id)
         
         # 记录日志
         if player_ids:
             logger.info(f"批量从房间 {room.room_id} 移除 {len(player_ids)} 个玩家: {[pid[:8] for pid in player_ids]}")
     
+    def _safe_chips(self, room: GameRoom, player_id: str) -> int:
+        """
+        获取玩家在房间内的筹码（游戏未创建时返回待入座买入）
+        
+        Args:
+            room: 房间对象
+            player_id: 玩家ID
+            
+        Returns:
+            int: 筹码数量，不在房间内返回0
+        """
+        if room.game:
+            return room.game.get_player_chips(player_id) or 0
+        return room.pending_buy_ins.get(player_id, 0)
+    
+    async def ensure_game(self, room: GameRoom) -> TexasHoldemGame:
+        """
+        获取房间游戏实例，不存在时创建并让待入座玩家入座
+        
+        Args:
+            room: 房间对象
+            
+        Returns:
+            TexasHoldemGame: 游戏实例
+        """
+        if room.game is None:
+            room.game = TexasHoldemGame(room.room_id, room.game_config)
+            for player_id, buy_in in list(room.pending_buy_ins.items()):
+                player = await self.player_manager.get_player(player_id)
+                display_name = player.display_name if player else ""
+                if room.game.add_player(player_id, buy_in, display_name):
+                    room.pending_buy_ins.pop(player_id, None)
+                    continue
+                
+                # 入座失败，返还买入并移出房间
+                room.pending_buy_ins.pop(player_id, None)
+                room.player_ids.pop(player_id, None)
+                self.unmap_player(player_id)
+                await self.player_manager.add_chips(player_id, buy_in, "入座失败返还")
+                logger.warning(f"玩家 {player_id} 入座房间 {room.room_id} 失败，已返还买入 {buy_in}")
+        return room.game
+    
+    def release_game(self, room: GameRoom):
+        """
+        丢弃房间的游戏实例，在座玩家的筹码转为待入座买入（下一局入座或离开/关闭房间时返还）
+        
+        Args:
+            room: 房间对象
+        """
+        game = room.game
+        if game is None:
+            return
+        for player_id in room.player_ids:
+            chips = game.get_player_chips(player_id)
+            if chips:
+                room.pending_buy_ins[player_id] = chips
+        room.game = None
+    
     async def _process_waiting_list(self, room: GameRoom):
         """
         处理房间等待列表
@@ -719,34 +1119,72 @@ class RoomManager:
         Args:
             room: 房间对象
         """
+        # 本次处理内的玩家缓存，避免重复查询
+        players_seen: Dict[str, Any] = {}
+        get_player = self.player_manager.get_or_create_player
+        join = self.join_room
+        pop_waiting = room.pop_waiting
+        room_id = room.room_id
+        min_buy_in = room.min_buy_in
+        
         while room.waiting_list and not room.is_full:
-            player_id = room.waiting_list.pop(0)
+            player_id = pop_waiting()
             
             # 检查玩家是否仍然有效
-            player = await self.player_manager.get_or_create_player(player_id)
-            if player.is_banned or player.chips < room.min_buy_in:
+            player = players_seen.get(player_id)
+            if player is None:
+                player = await get_player(player_id)
+                players_seen[player_id] = player
+            if player.is_banned or player.chips < min_buy_in:
                 continue
             
             # 尝试加入房间
-            if await self.join_room(room.room_id, player_id):
+            if await join(room_id, player_id, _player=player):
                 logger.info(f"等待列表玩家 {player_id} 成功加入房间 {room.room_id}")
             else:
                 break
     
-    async def _cleanup_room(self, room_id: str):
+    async def _cleanup_room(self, room_id: str, immediate: bool = False):
         """
         清理房间资源
         
         Args:
             room_id: 房间ID
+            immediate: 是否立即删除（系统关闭时使用）
         """
         room = self.rooms.get(room_id)
         if room and room.status == RoomStatus.FINISHED and room.current_players == 0:
-            # 延迟删除，给时间处理最后的数据
-            await asyncio.sleep(30)
+            # 延迟删除，给时间处理最后的数据（到期后由清理循环或下一次房间查询/创建执行）
+            if not immediate:
+                self._pending_deletions[room_id] = time.monotonic() + self.room_deletion_delay
+                # 待删除的房间不再出现在公开房间列表中
+                self.public_rooms.pop(room_id, None)
+                return
             
-            if room_id in self.rooms:
-                del self.rooms[room_id]
+            self._pending_deletions.pop(room_id, None)
+            if self._remove_room(room_id):
+                logger.info(f"房间 {room_id} 资源已清理")
+    
+    def _flush_due_deletions(self):
+        """有待删除房间时，顺带删除其中已到期的（供房间创建与列表查询调用）"""
+        if self._pending_deletions:
+            self._flush_pending_deletions(time.monotonic())
+    
+    def _flush_pending_deletions(self, now: float):
+        """
+        删除已到期的待删除房间
+        
+        Args:
+            now: time.monotonic() 时间点
+        """
+        expired = [room_id for room_id, deadline in self._pending_deletions.items() if deadline <= now]
+        for room_id in expired:
+            del self._pending_deletions[room_id]
+            # 到期时再次确认房间仍处于结束状态且无人，避免删除已重新使用的房间
+            room = self.rooms.get(room_id)
+            if not room or room.status is not RoomStatus.FINISHED or room.current_players:
+                continue
+            if self._remove_room(room_id):
                 logger.info(f"房间 {room_id} 资源已清理")
     
     async def _room_cleanup_loop(self):
@@ -754,6 +1192,7 @@ class RoomManager:
         while True:
             try:
                 await asyncio.sleep(self.room_cleanup_interval)
+                self._flush_pending_deletions(time.monotonic())
                 await self._cleanup_inactive_rooms()
                 
             except asyncio.CancelledError:
@@ -763,23 +1202,44 @@ class RoomManager:
     
     async def _cleanup_inactive_rooms(self):
         """清理不活跃的房间"""
-        current_time = time.time()
+        current_time = time.monotonic()
         rooms_to_close = []
-        
-        for room_id, room in self.rooms.items():
+        rooms = self.rooms
+        by_status = self.rooms_by_status
+        timeout = self.inactive_room_timeout
+        set_status = self.set_status
+        finished = RoomStatus.FINISHED
+        
+        # 只检查未在游戏中、也未结束的房间
+        idle_candidates = (by_status[RoomStatus.WAITING] |
+                           by_status[RoomStatus.STARTING] |
+                           by_status[RoomStatus.PAUSED])
+        
+        for room_id in idle_candidates:
+            room = rooms.get(room_id)
+            if not room:
+                continue
+            
             # 检查房间是否长时间无活动
-            if (current_time - room.last_activity > self.inactive_room_timeout and
-                room.status != RoomStatus.IN_GAME):
+            if current_time - room.last_activity > timeout:
                 rooms_to_close.append(room_id)
             
             # 检查空房间
-            elif room.current_players == 0 and room.status != RoomStatus.FINISHED:
-                room.status = RoomStatus.FINISHED
+            elif not room.player_ids:
+                set_status(room, finished)
+                rooms_to_close.append(room_id)
+        
+        # 游戏中的房间只检查是否已空
+        for room_id in list(by_status[RoomStatus.IN_GAME]):
+            room = rooms.get(room_id)
+            if room and not room.player_ids:
+                set_status(room, finished)
                 rooms_to_close.append(room_id)
         
         # 关闭需要清理的房间
+        close = self.close_room
         for room_id in rooms_to_close:
-            await self.close_room(room_id, "长时间无活动")
+            await close(room_id, "长时间无活动")
     
     async def get_room_stats(self) -> Dict[str, Any]:
         """
@@ -788,18 +1248,27 @@ class RoomManager:
         Returns:
             Dict: 统计信息
         """
-        # 只统计活跃房间（非FINISHED状态）
-        active_room_list = [r for r in self.rooms.values() if r.status != RoomStatus.FINISHED]
-        
-        total_rooms = len(active_room_list)
-        waiting_rooms = len([r for r in active_room_list if r.status == RoomStatus.WAITING])
-        in_game_rooms = len([r for r in active_room_list if r.status == RoomStatus.IN_GAME])
-        starting_rooms = len([r for r in active_room_list if r.status == RoomStatus.STARTING])
-        paused_rooms = len([r for r in active_room_list if r.status == RoomStatus.PAUSED])
-        
-        # 统计实际在游戏中的玩家
-        total_players = sum(r.current_players for r in active_room_list)
-        total_observers = sum(len(r.observers) for r in active_room_list)
+        waiting_rooms = in_game_rooms = starting_rooms = paused_rooms = finished_rooms = 0
+        total_players = total_observers = 0
+        
+        # 单次遍历累计各项计数，只统计活跃房间（非FINISHED状态）的玩家
+        for r in self.rooms.values():
+            status = r.status
+            if status is RoomStatus.FINISHED:
+                finished_rooms += 1
+                continue
+            if status is RoomStatus.WAITING:
+                waiting_rooms += 1
+            elif status is RoomStatus.IN_GAME:
+                in_game_rooms += 1
+            elif status is RoomStatus.STARTING:
+                starting_rooms += 1
+            elif status is RoomStatus.PAUSED:
+                paused_rooms += 1
+            total_players += len(r.player_ids)
+            total_observers += len(r.observers)
+        
+        total_rooms = len(self.rooms) - finished_rooms
         
         return {
             'total_rooms': total_rooms,
@@ -807,7 +1276,7 @@ class RoomManager:
             'active_rooms': in_game_rooms,  # IN_GAME状态的房间
             'starting_rooms': starting_rooms,
             'paused_rooms': paused_rooms,
-            'finished_rooms': len([r for r in self.rooms.values() if r.status == RoomStatus.FINISHED]),
+            'finished_rooms': finished_rooms,
             'total_players': total_players,
             'total_observers': total_observers,
             'average_players_per_room': total_players / max(1, total_rooms) if total_rooms > 0 else 0
@@ -838,7 +1307,7 @@ class RoomManager:
                                 max_players=room_data['max_players']
                             )
                             room.status = RoomStatus.WAITING
-                            self.rooms[room.room_id] = room
+                            self._add_room(room)
                             
                             logger.info(f"恢复房间: {room.room_id}")
                             
@@ -858,6 +1327,13 @@ class RoomManager:
         """清理资源"""
         if self.cleanup_task:
             self.cleanup_task.cancel()
+        
+        # 等待未完成的后台任务执行完毕（不取消，避免离开房间的筹码返还丢失）
+        if self._background_tasks:
+            _, pending = await asyncio.wait(set(self._background_tasks), timeout=self.shutdown_drain_timeout)
+            if pending:
+                logger.warning(f"仍有 {len(pending)} 个后台任务未在 {self.shutdown_drain_timeout} 秒内完成")
             
         await self.close_all_rooms()
+        self._pending_deletions.clear()
         logger.info("房间管理器资源已清理")
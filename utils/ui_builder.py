@@ -236,7 +236,7 @@ class GameUIBuilder:
             if room.player_ids:
                 lines.append("")
                 lines.append("👥 在座玩家:")
-                for i, player_id in enumerate(sorted(room.player_ids), 1):
+                for i, player_id in enumerate(room.player_ids, 1):
                     creator_mark = "👑" if player_id == room.creator_id else f"{i}."
                     # 显示更完整的玩家名称
                     display_name = player_id[:20] if len(player_id) > 20 else player_id